@@ -1,12 +1,19 @@
-import io
-from typing import List, Tuple
+import os
 
 import streamlit as st
 from PIL import Image
 
-from outfit_to_emoji.detection import detect_clothing_items, load_imagenet_model
-from outfit_to_emoji.colors import extract_dominant_colors, render_color_badges
-from outfit_to_emoji.emoji_map import map_items_and_colors_to_emojis, render_color_emoji_chips
+from outfit_to_emoji.imaging import read_image_from_bytes
+from outfit_to_emoji.pipeline import analyze_image
+from outfit_to_emoji.profiling import Profiler
+from outfit_to_emoji.rendering import (
+    SPINNER_HTML,
+    color_chips_html,
+    copy_widget_html,
+    emoji_display_html,
+    stylesheet,
+)
+from outfit_to_emoji.resources import ModelManager, manager_from_env, process_budget
 
 
 st.set_page_config(
@@ -15,40 +22,34 @@ st.set_page_config(
     layout="centered",
 )
 
-# Add custom CSS (simplified, no big gradient boxes; square color badges)
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    .main { font-family: 'Inter', sans-serif; }
-    .stApp { background: #0f172a; }
-    .main-container { padding: 12px 0; }
-    .title-container { text-align:center; margin-bottom: 12px; }
-    .result-card { background: transparent; padding: 0; margin: 10px 0; }
-    .emoji-display { font-size: 2.2rem; text-align:center; padding: 8px; color: #e2e8f0; }
-    .spinner-container { display:flex; justify-content:center; padding: 8px; }
-    .loading-spinner { width: 28px; height: 28px; border: 3px solid rgba(255,255,255,0.15); border-top: 3px solid #22d3ee; border-radius: 50%; animation: spin 1s linear infinite; }
-    @keyframes spin { 0% { transform: rotate(0deg);} 100% { transform: rotate(360deg);} }
-    /* squared color badges (overrides) */
-    .color-badge { display:inline-flex; align-items:center; gap:8px; margin:4px 10px 4px 0; padding:6px 10px; border-radius:8px; border:1px solid #1f2937; background:#0b1220; color:#cbd5e1; }
-    /* copy area */
-    .copy-wrap { display:flex; gap:8px; align-items:center; background:#0b1220; padding:12px; border-radius:10px; border:1px solid #1f2937; }
-    .copy-input { flex:1; padding:10px; font-size:16px; background:#0b1220; color:#e2e8f0; border:1px solid #1f2937; border-radius:8px; }
-    .copy-button { background:#22d3ee; color:#0b1220; border:none; border-radius:8px; padding:10px 14px; cursor:pointer; font-weight:600; }
-    .copy-button:hover { filter: brightness(1.1); }
-</style>
-""", unsafe_allow_html=True)
+# Static CSS (including animation keyframes) is minified once and sent once per rerun
+st.markdown(stylesheet(), unsafe_allow_html=True)
 
 
 @st.cache_resource(show_spinner=False)
+def get_model_manager() -> ModelManager:
+    # Unloads the model after OUTFIT_TO_EMOJI_MODEL_IDLE_S idle seconds and
+    # reloads it from the local cache on the next request
+    return manager_from_env()
+
+
 def get_model():
-    return load_imagenet_model()
+    return get_model_manager().get()
 
 
-def read_image_from_bytes(uploaded_bytes: bytes) -> Image.Image:
-    return Image.open(io.BytesIO(uploaded_bytes)).convert("RGB")
+@st.cache_resource(show_spinner=False)
+def get_profiler() -> Profiler:
+    return Profiler(
+        output_dir=os.environ.get("OUTFIT_TO_EMOJI_PROFILE_DIR", "profiles"),
+        sample_every=int(os.environ.get("OUTFIT_TO_EMOJI_PROFILE_EVERY", "100")),
+        budget=process_budget(),
+    )
 
 
 def main():
+    # Loads and warms the model up front when an offline bundle is configured
+    get_model_manager()
+
     # Main container (clean)
     st.markdown('<div class="main-container">', unsafe_allow_html=True)
     
@@ -61,7 +62,7 @@ def main():
     with st.expander("🔍 How it works", expanded=False):
         st.markdown(
             "- We use a pre-trained CNN (MobileNetV2) to detect clothing-related cues.\n"
-            "- We extract dominant colors from the image.\n"
+            "- We extract dominant colors from the outfit, ignoring background such as walls and floors.\n"
             "- We map items and colors into a fun emoji string.")
 
     # Image input options with animations
@@ -102,17 +103,24 @@ def main():
     st.image(image, caption="Input outfit photo", use_column_width=True)
 
     # Animated loading spinner
-    st.markdown("""
-    <div class="spinner-container"><div class="loading-spinner"></div></div>
-    <div style="text-align:center; color:#cbd5e1;">Analyzing your outfit…</div>
-    """, unsafe_allow_html=True)
+    st.markdown(SPINNER_HTML, unsafe_allow_html=True)
+
+    profile_requested = st.sidebar.checkbox("⏱️ Profile this analysis", value=False)
 
     with st.spinner(""):
         model = get_model()
-        detected_items: List[Tuple[str, float]] = detect_clothing_items(image, model=model, top_k=5)
-        dominant = extract_dominant_colors(image, num_colors=4)
+        result = analyze_image(
+            image,
+            model=model,
+            spec=get_model_manager().spec,
+            top_k=5,
+            num_colors=4,
+            profiler=get_profiler(),
+            profile=profile_requested,
+            mask_background=True,
+        )
 
-    item_labels = [f"{label} ({prob:.0%})" for label, prob in detected_items]
+    item_labels = [f"{label} ({prob:.0%})" for label, prob in result.items]
 
     # Results (clean)
     st.subheader("👕 Detected Items")
@@ -123,51 +131,25 @@ def main():
 
     st.subheader("🎨 Dominant Colors")
     # Show color emojis (not shapes)
-    st.markdown(render_color_emoji_chips(dominant), unsafe_allow_html=True)
+    st.markdown(color_chips_html(result.colors), unsafe_allow_html=True)
 
-    emoji_str, emoji_parts = map_items_and_colors_to_emojis(detected_items, dominant)
+    emoji_str, emoji_parts = result.emoji, result.emoji_parts
     
     # Emoji display with float + pulsing location
     st.subheader("😊 Your Emoji Fit")
-    location_html = ""
-    if emoji_parts.get("location"):
-        loc = emoji_parts["location"][0]
-        location_html = f"<span style='display:inline-block; animation: pulseGlow 1.6s ease-in-out infinite;'>{loc}</span>"
-    st.markdown(
-        f"""
-        <div class='emoji-display' style="animation: floatY 2s ease-in-out infinite;">
-            {" ".join(emoji_parts.get('items', []))} {" ".join(emoji_parts.get('colors', []))} {location_html}
-        </div>
-        <style>
-        @keyframes floatY {{ 0%{{transform: translateY(0);}} 50%{{transform: translateY(-4px);}} 100%{{transform: translateY(0);}} }}
-        @keyframes pulseGlow {{ 0%{{filter:brightness(1);}} 50%{{filter:brightness(1.4);}} 100%{{filter:brightness(1);}} }}
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(emoji_display_html(emoji_parts), unsafe_allow_html=True)
 
     # Enhanced copy-to-clipboard with animation
-    st.components.v1.html(
-        f"""
-        <div class='copy-wrap'>
-          <input id='emojiOutput' class='copy-input' value="{emoji_str}" readonly />
-          <button class='copy-button' onclick="navigator.clipboard.writeText(document.getElementById('emojiOutput').value); this.innerHTML='✅ Copied!'; setTimeout(() => this.innerHTML='📋 Copy', 1600)">📋 Copy</button>
-        </div>
-        """,
-        height=70,
-    )
+    st.components.v1.html(copy_widget_html(emoji_str), height=70)
 
     with st.expander("🔧 Debug details", expanded=False):
-        st.json(
-            {
-                "items": [{"label": l, "prob": float(p)} for l, p in detected_items],
-                "colors": [
-                    {"name": c.name, "rgb": c.rgb, "hex": c.hex}
-                    for c in dominant
-                ],
-                "emoji_parts": emoji_parts,
-            }
-        )
+        st.json(result.to_dict())
+        if result.profile is not None:
+            st.markdown("**Profile breakdown (ms, sampled)**")
+            st.bar_chart(result.profile.stages)
+            if result.profile.path:
+                st.caption(f"Flamegraph stacks written to `{result.profile.path}`")
+        st.json({"model_resources": get_model_manager().metrics.to_dict()})
     st.caption("✨ Thanks for using Outfit → Emoji Converter! Share your emoji fit! ✨")
     
     # Close main container
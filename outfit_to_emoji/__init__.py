@@ -2,6 +2,20 @@ __all__ = [
     "detection",
     "colors",
     "emoji_map",
+    "zoo",
+    "imaging",
+    "pipeline",
+    "profiling",
+    "loadgen",
+    "resources",
+    "analytics",
+    "scheduling",
+    "bundle",
+    "warm_pool",
+    "bench",
+    "shards",
+    "rendering",
+    "views",
 ]
 
 
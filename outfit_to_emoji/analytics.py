@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .colors import NamedColor
+from .pipeline import AnalysisResult
+
+DAY_S = 86_400
+# The Unix epoch is a Thursday; shifting by 3 days makes week buckets start on Monday
+_WEEK_OFFSET_S = 3 * DAY_S
+
+
+class Dictionary:
+    """Maps strings to dense integer ids in first-seen order."""
+
+    def __init__(self, values: Iterable[str] = ()) -> None:
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+        for v in values:
+            self.encode(v)
+
+    def encode(self, value: str) -> int:
+        idx = self._ids.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self._ids[value] = idx
+            self.values.append(value)
+        return idx
+
+    def decode(self, idx: int) -> str:
+        return self.values[idx]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class Column:
+    """Append-only numpy column stored as fixed-size chunks."""
+
+    def __init__(self, dtype, chunk_rows: int = 1 << 16) -> None:
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = chunk_rows
+        self._sealed: List[np.ndarray] = []
+        self._current = np.empty(chunk_rows, dtype=self.dtype)
+        self._fill = 0
+        self._cache: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._sealed) * self.chunk_rows + self._fill
+
+    def append(self, value) -> None:
+        self._current[self._fill] = value
+        self._fill += 1
+        if self._fill == self.chunk_rows:
+            self._sealed.append(self._current)
+            self._current = np.empty(self.chunk_rows, dtype=self.dtype)
+            self._fill = 0
+        self._cache = None
+
+    def extend(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=self.dtype)
+        while len(values):
+            take = min(len(values), self.chunk_rows - self._fill)
+            self._current[self._fill:self._fill + take] = values[:take]
+            self._fill += take
+            values = values[take:]
+            if self._fill == self.chunk_rows:
+                self._sealed.append(self._current)
+                self._current = np.empty(self.chunk_rows, dtype=self.dtype)
+                self._fill = 0
+        self._cache = None
+
+    def values(self) -> np.ndarray:
+        """All rows as one contiguous array, cached until the next append."""
+        if self._cache is None:
+            self._cache = np.concatenate(self._sealed + [self._current[:self._fill]])
+        return self._cache
+
+
+def _period_index(ts: np.ndarray, period: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Dense period number per row plus each period's start timestamp.
+
+    Computed arithmetically rather than with np.unique, so grouping stays a
+    linear pass instead of a sort over every row.
+    """
+    if period is None or len(ts) == 0:
+        return np.zeros(len(ts), dtype=np.int64), np.zeros(1, dtype=np.int64)
+    if period in ("day", "week"):
+        length = DAY_S if period == "day" else 7 * DAY_S
+        offset = 0 if period == "day" else _WEEK_OFFSET_S
+        number = (ts + offset) // length
+        base = int(number.min())
+        index = number - base
+        starts = (np.arange(int(index.max()) + 1, dtype=np.int64) + base) * length - offset
+        return index, starts
+    if period == "month":
+        number = ts.astype("datetime64[s]").astype("datetime64[M]").astype(np.int64)
+        base = int(number.min())
+        index = number - base
+        months = np.arange(int(index.max()) + 1, dtype=np.int64) + base
+        starts = months.astype("datetime64[M]").astype("datetime64[s]").astype(np.int64)
+        return index, starts
+    raise ValueError(f"Unknown period '{period}', expected 'day', 'week', 'month' or None")
+
+
+def _grouped_counts(
+    ts: np.ndarray, ids: np.ndarray, n_ids: int, period: Optional[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(period starts, counts[period, id]) via a single bincount; empty periods dropped."""
+    index, starts = _period_index(ts, period)
+    counts = np.bincount(index * n_ids + ids, minlength=len(starts) * n_ids).reshape(len(starts), n_ids)
+    present = counts.sum(axis=1) > 0
+    return starts[present], counts[present]
+
+
+def _top_k(
+    periods: np.ndarray, counts: np.ndarray, k: int, names: List[str]
+) -> Dict[int, List[Tuple[str, int]]]:
+    order = np.argsort(-counts, axis=1, kind="stable")[:, :k]
+    top = np.take_along_axis(counts, order, axis=1)
+    return {
+        int(p): [(names[i], int(c)) for i, c in zip(row_ids, row_counts) if c > 0]
+        for p, row_ids, row_counts in zip(periods, order, top)
+    }
+
+
+class ConversionStore:
+    """Append-only columnar store of conversion results for trend queries.
+
+    Three tables share a conversion row number: conversions (timestamp, emoji),
+    items (one row per detected label) and colors (one row per dominant color).
+    Labels, color names and emoji strings are dictionary-encoded.
+    """
+
+    def __init__(self, chunk_rows: int = 1 << 16) -> None:
+        self.labels = Dictionary()
+        self.color_names = Dictionary()
+        self.emojis = Dictionary()
+        self.conversions = {
+            "ts": Column(np.int64, chunk_rows),
+            "emoji_id": Column(np.int32, chunk_rows),
+        }
+        self.items = {
+            "conversion": Column(np.int64, chunk_rows),
+            "ts": Column(np.int64, chunk_rows),
+            "label_id": Column(np.int32, chunk_rows),
+            "prob": Column(np.float32, chunk_rows),
+        }
+        self.colors = {
+            "conversion": Column(np.int64, chunk_rows),
+            "ts": Column(np.int64, chunk_rows),
+            "color_id": Column(np.int32, chunk_rows),
+            "rank": Column(np.uint8, chunk_rows),
+            "r": Column(np.uint8, chunk_rows),
+            "g": Column(np.uint8, chunk_rows),
+            "b": Column(np.uint8, chunk_rows),
+        }
+
+    def __len__(self) -> int:
+        return len(self.conversions["ts"])
+
+    def append(
+        self,
+        items: List[Tuple[str, float]],
+        colors: List[NamedColor],
+        emoji: str,
+        timestamp: Optional[float] = None,
+    ) -> int:
+        row = len(self)
+        ts = int(time.time() if timestamp is None else timestamp)
+        self.conversions["ts"].append(ts)
+        self.conversions["emoji_id"].append(self.emojis.encode(emoji))
+        for label, prob in items:
+            self.items["conversion"].append(row)
+            self.items["ts"].append(ts)
+            self.items["label_id"].append(self.labels.encode(label))
+            self.items["prob"].append(prob)
+        for rank, c in enumerate(colors):
+            self.colors["conversion"].append(row)
+            self.colors["ts"].append(ts)
+            self.colors["color_id"].append(self.color_names.encode(c.name))
+            self.colors["rank"].append(rank)
+            self.colors["r"].append(c.rgb[0])
+            self.colors["g"].append(c.rgb[1])
+            self.colors["b"].append(c.rgb[2])
+        return row
+
+    def append_result(self, result: AnalysisResult, timestamp: Optional[float] = None) -> int:
+        return self.append(result.items, result.colors, result.emoji, timestamp=timestamp)
+
+    def top_colors(
+        self, period: Optional[str] = "week", k: int = 5, max_rank: Optional[int] = None
+    ) -> Dict[int, List[Tuple[str, int]]]:
+        """Most frequent color names per period, keyed by period start timestamp.
+
+        ``max_rank`` restricts to each conversion's first N dominant colors.
+        """
+        ts = self.colors["ts"].values()
+        ids = self.colors["color_id"].values()
+        if max_rank is not None:
+            keep = self.colors["rank"].values() < max_rank
+            ts, ids = ts[keep], ids[keep]
+        periods, counts = _grouped_counts(ts, ids, len(self.color_names), period)
+        return _top_k(periods, counts, k, self.color_names.values)
+
+    def top_items(
+        self, period: Optional[str] = "week", k: int = 5, min_prob: float = 0.0
+    ) -> Dict[int, List[Tuple[str, int]]]:
+        ts = self.items["ts"].values()
+        ids = self.items["label_id"].values()
+        if min_prob > 0:
+            keep = self.items["prob"].values() >= min_prob
+            ts, ids = ts[keep], ids[keep]
+        periods, counts = _grouped_counts(ts, ids, len(self.labels), period)
+        return _top_k(periods, counts, k, self.labels.values)
+
+    def conversions_per_period(self, period: str = "week") -> Dict[int, int]:
+        index, starts = _period_index(self.conversions["ts"].values(), period)
+        counts = np.bincount(index, minlength=len(starts))
+        return {int(p): int(c) for p, c in zip(starts, counts) if c}
+
+    def mean_rgb(self, period: Optional[str] = "week") -> Dict[int, Dict[str, Tuple[int, int, int]]]:
+        """Average RGB actually observed for each color name per period."""
+        ts = self.colors["ts"].values()
+        ids = self.colors["color_id"].values()
+        n = len(self.color_names)
+        bucket, periods = _period_index(ts, period)
+        key = bucket * n + ids
+        size = len(periods) * n
+        counts = np.bincount(key, minlength=size)
+        sums = np.stack(
+            [np.bincount(key, weights=self.colors[ch].values(), minlength=size) for ch in ("r", "g", "b")],
+            axis=1,
+        )
+        means = (sums / np.maximum(counts, 1)[:, None]).round().astype(int).reshape(len(periods), n, 3)
+        counts = counts.reshape(len(periods), n)
+        return {
+            int(p): {
+                self.color_names.values[i]: tuple(int(v) for v in means[pi, i])
+                for i in np.flatnonzero(counts[pi])
+            }
+            for pi, p in enumerate(periods)
+        }
+
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        for table_name, table in (("conversions", self.conversions), ("items", self.items), ("colors", self.colors)):
+            for col_name, col in table.items():
+                np.save(os.path.join(directory, f"{table_name}.{col_name}.npy"), col.values())
+        with open(os.path.join(directory, "dictionaries.json"), "w") as f:
+            json.dump(
+                {"labels": self.labels.values, "colors": self.color_names.values, "emojis": self.emojis.values},
+                f,
+                ensure_ascii=False,
+            )
+
+    @classmethod
+    def load(cls, directory: str, chunk_rows: int = 1 << 16) -> "ConversionStore":
+        store = cls(chunk_rows=chunk_rows)
+        with open(os.path.join(directory, "dictionaries.json")) as f:
+            dictionaries = json.load(f)
+        store.labels = Dictionary(dictionaries["labels"])
+        store.color_names = Dictionary(dictionaries["colors"])
+        store.emojis = Dictionary(dictionaries["emojis"])
+        for table_name, table in (("conversions", store.conversions), ("items", store.items), ("colors", store.colors)):
+            for col_name, col in table.items():
+                col.extend(np.load(os.path.join(directory, f"{table_name}.{col_name}.npy")))
+        return store
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+from typing import Dict, List
+
+from PIL import Image
+
+from .zoo import DEFAULT_MODEL
+
+
+def _cold_first_result(image_bytes: bytes, model_name: str, queue) -> None:
+    # Runs in a freshly spawned interpreter: TF import, model build and first
+    # predict all happen here, exactly like a new replica using get_model().
+    from .detection import detect_clothing_items, load_imagenet_model
+    from .imaging import read_image_from_bytes
+    from .zoo import get_model_spec
+
+    model = load_imagenet_model(model_name)
+    items = detect_clothing_items(read_image_from_bytes(image_bytes), model=model, spec=get_model_spec(model_name))
+    queue.put(items)
+
+
+def benchmark_startup(
+    image_bytes: bytes, model_name: str = DEFAULT_MODEL, timeout_s: float = 600.0
+) -> Dict[str, float]:
+    """Time-to-first-result for a new lazy worker vs. a worker forked from a warm parent."""
+    import queue as queue_module
+
+    from .warm_pool import WarmWorkerPool, prepare_parent
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    t0 = time.perf_counter()
+    proc = ctx.Process(target=_cold_first_result, args=(image_bytes, model_name, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout_s
+    try:
+        # Poll so a child that crashed (e.g. TF missing, weights download blocked) is reported right away
+        while True:
+            try:
+                queue.get(timeout=1.0)
+                break
+            except queue_module.Empty:
+                if not proc.is_alive() or time.monotonic() >= deadline:
+                    raise RuntimeError(
+                        f"Cold worker for '{model_name}' failed or timed out (exit code {proc.exitcode})"
+                    ) from None
+        lazy_s = time.perf_counter() - t0
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+
+    parent_s = prepare_parent(model_name)
+    t0 = time.perf_counter()
+    with WarmWorkerPool(processes=1, model_name=model_name) as pool:
+        pool.analyze(image_bytes)
+        warm_s = time.perf_counter() - t0
+
+    return {
+        "lazy_first_result_s": lazy_s,
+        "forked_first_result_s": warm_s,
+        "parent_warmup_s": parent_s,
+        "speedup": lazy_s / warm_s if warm_s > 0 else float("inf"),
+    }
+
+
+def benchmark_color_batch(images: List[Image.Image], num_colors: int = 4) -> Dict[str, float]:
+    """Images/second for a loop over extract_dominant_colors vs. extract_dominant_colors_batch."""
+    from .colors import extract_dominant_colors, extract_dominant_colors_batch
+
+    t0 = time.perf_counter()
+    looped = [extract_dominant_colors(img, num_colors=num_colors) for img in images]
+    loop_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batched = extract_dominant_colors_batch(images, num_colors=num_colors)
+    batch_s = time.perf_counter() - t0
+
+    same = sum(
+        sorted(c.name for c in a) == sorted(c.name for c in b) for a, b in zip(looped, batched)
+    )
+    return {
+        "images": len(images),
+        "loop_images_per_s": len(images) / loop_s,
+        "batch_images_per_s": len(images) / batch_s,
+        "speedup": loop_s / batch_s,
+        "same_color_names": same / len(images) if images else 1.0,
+    }
+
+
+
+def _inline_render(colors, emoji_str: str, emoji_parts: Dict[str, List[str]]) -> List[str]:
+    # app.py output before rendering.py: full CSS every rerun, per-result keyframes and inline styles
+    from .emoji_map import get_color_emoji
+    from .rendering import COPY_CSS_SOURCE, CSS_SOURCE
+
+    chips = "".join(
+        f"<span class='color-badge'>{get_color_emoji(c.name, i)} <span style='text-transform:capitalize'>{c.name}</span></span>"
+        for i, c in enumerate(colors)
+    )
+    loc = emoji_parts["location"][0] if emoji_parts.get("location") else ""
+    return [
+        f"\n<style>\n{CSS_SOURCE}{COPY_CSS_SOURCE}</style>\n",
+        """
+    <div class="spinner-container"><div class="loading-spinner"></div></div>
+    <div style="text-align:center; color:#cbd5e1;">Analyzing your outfit…</div>
+    """,
+        chips,
+        f"""
+        <div class='emoji-display' style="animation: floatY 2s ease-in-out infinite;">
+            {" ".join(emoji_parts.get('items', []))} {" ".join(emoji_parts.get('colors', []))} <span style='display:inline-block; animation: pulseGlow 1.6s ease-in-out infinite;'>{loc}</span>
+        </div>
+        <style>
+        @keyframes floatY {{ 0%{{transform: translateY(0);}} 50%{{transform: translateY(-4px);}} 100%{{transform: translateY(0);}} }}
+        @keyframes pulseGlow {{ 0%{{filter:brightness(1);}} 50%{{filter:brightness(1.4);}} 100%{{filter:brightness(1);}} }}
+        </style>
+        """,
+        f"""
+        <div class='copy-wrap'>
+          <input id='emojiOutput' class='copy-input' value="{emoji_str}" readonly />
+          <button class='copy-button' onclick="navigator.clipboard.writeText(document.getElementById('emojiOutput').value); this.innerHTML='✅ Copied!'; setTimeout(() => this.innerHTML='📋 Copy', 1600)">📋 Copy</button>
+        </div>
+        """,
+    ]
+
+
+def _cached_render(colors, emoji_str: str, emoji_parts: Dict[str, List[str]]) -> List[str]:
+    from .rendering import SPINNER_HTML, color_chips_html, copy_widget_html, emoji_display_html, stylesheet
+
+    return [
+        stylesheet(),
+        SPINNER_HTML,
+        color_chips_html(colors),
+        emoji_display_html(emoji_parts),
+        copy_widget_html(emoji_str),
+    ]
+
+
+def benchmark_rendering(images: List[Image.Image], reruns: int = 200, num_colors: int = 4) -> Dict[str, float]:
+    """HTML bytes and render time per Streamlit rerun, inline f-strings vs. rendering.py."""
+    from .colors import extract_dominant_colors
+    from .emoji_map import map_items_and_colors_to_emojis
+
+    results = []
+    for img in images:
+        colors = extract_dominant_colors(img, num_colors=num_colors)
+        results.append((colors, *map_items_and_colors_to_emojis([], colors)))
+
+    report: Dict[str, float] = {"results": len(results)}
+    for label, render in (("inline", _inline_render), ("cached", _cached_render)):
+        total_bytes = 0
+        t0 = time.perf_counter()
+        for i in range(reruns):
+            total_bytes += sum(len(f.encode("utf-8")) for f in render(*results[i % len(results)]))
+        elapsed = time.perf_counter() - t0
+        report[f"{label}_bytes_per_rerun"] = total_bytes / reruns
+        report[f"{label}_us_per_rerun"] = elapsed / reruns * 1e6
+    return report
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Outfit → Emoji micro-benchmarks.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    startup = sub.add_parser("startup", help="Cold lazy worker vs. warm forked worker")
+    startup.add_argument("image", help="Image file used for the first request")
+    startup.add_argument("--model", default=DEFAULT_MODEL)
+
+    colors = sub.add_parser("colors", help="Per-image loop vs. batched color extraction")
+    colors.add_argument("images", help="Directory of .jpg/.jpeg/.png files")
+    colors.add_argument("--num-colors", type=int, default=4)
+
+    render = sub.add_parser("render", help="Inline HTML f-strings vs. memoized rendering module")
+    render.add_argument("images", help="Directory of .jpg/.jpeg/.png files")
+    render.add_argument("--reruns", type=int, default=200)
+
+    args = parser.parse_args()
+    if args.command == "render":
+        from .imaging import read_image_from_bytes
+        from .loadgen import load_images
+
+        result = benchmark_rendering([read_image_from_bytes(b) for b in load_images(args.images)], reruns=args.reruns)
+        for label in ("inline", "cached"):
+            print(
+                f"{label:<20}: {result[f'{label}_bytes_per_rerun']:.0f} bytes/rerun, "
+                f"{result[f'{label}_us_per_rerun']:.1f} µs/rerun"
+            )
+    elif args.command == "colors":
+        from .imaging import read_image_from_bytes
+        from .loadgen import load_images
+
+        result = benchmark_color_batch(
+            [read_image_from_bytes(b) for b in load_images(args.images)], num_colors=args.num_colors
+        )
+        print(f"images              : {result['images']}")
+        print(f"loop                : {result['loop_images_per_s']:.1f} images/s")
+        print(f"batch               : {result['batch_images_per_s']:.1f} images/s")
+        print(f"speedup             : {result['speedup']:.1f}x")
+        print(f"same color names    : {result['same_color_names']:.0%}")
+    elif args.command == "startup":
+        with open(args.image, "rb") as f:
+            result = benchmark_startup(f.read(), model_name=args.model)
+        print(f"lazy get_model path : {result['lazy_first_result_s']:.2f} s to first result")
+        print(f"forked warm worker  : {result['forked_first_result_s']:.2f} s to first result")
+        print(f"parent warmup (once): {result['parent_warmup_s']:.2f} s")
+        print(f"speedup             : {result['speedup']:.1f}x")
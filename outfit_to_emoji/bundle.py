@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .detection import warmup_model
+from .zoo import DEFAULT_MODEL, ModelSpec, get_model_spec
+
+try:
+    import tensorflow as tf
+    TENSORFLOW_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dep guard
+    TENSORFLOW_AVAILABLE = False
+    tf = None  # type: ignore
+
+# Same file keras.applications' decode_predictions downloads on first use
+CLASS_INDEX_URL = "https://storage.googleapis.com/download.tensorflow.org/data/imagenet_class_index.json"
+MANIFEST = "manifest.json"
+CURRENT = "current"
+BUNDLE_FORMAT = 1
+
+
+def _require_tensorflow() -> None:
+    if not TENSORFLOW_AVAILABLE:
+        raise RuntimeError(
+            "TensorFlow/Keras not available. Please install tensorflow to export or load model bundles."
+        )
+
+
+def _sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_weights(model, path: str) -> List[Dict[str, Any]]:
+    """Write all weights back to back as raw float32 and return their index."""
+    index: List[Dict[str, Any]] = []
+    offset = 0
+    with open(path, "wb") as f:
+        for w in model.get_weights():
+            arr = np.ascontiguousarray(w, dtype=np.float32)
+            f.write(arr.tobytes())
+            index.append({"shape": list(arr.shape), "offset": offset})
+            offset += arr.nbytes
+    return index
+
+
+def export_bundle(
+    out_dir: str,
+    model_names: Optional[List[str]] = None,
+    version: Optional[str] = None,
+    tflite: bool = False,
+) -> str:
+    """Export weights, the ImageNet class index and optional TFLite models to ``out_dir/<version>``.
+
+    Needs network access once (to fetch weights); hosts that load the bundle do not.
+    Returns the path of the new version directory, which also becomes ``current``.
+    """
+    _require_tensorflow()
+    version = version or time.strftime("%Y%m%d-%H%M%S")
+    bundle_dir = os.path.join(out_dir, version)
+    os.makedirs(bundle_dir, exist_ok=False)
+
+    class_index = tf.keras.utils.get_file("imagenet_class_index.json", CLASS_INDEX_URL, cache_subdir="models")
+    shutil.copyfile(class_index, os.path.join(bundle_dir, "imagenet_class_index.json"))
+
+    models: Dict[str, Dict[str, Any]] = {}
+    for name in model_names or [DEFAULT_MODEL]:
+        spec = get_model_spec(name)
+        model = spec.load()
+        weights_file = f"{name}.weights.f32"
+        entry: Dict[str, Any] = {
+            "input_size": spec.input_size,
+            "params": int(model.count_params()),
+            "weights": weights_file,
+            "tensors": _write_weights(model, os.path.join(bundle_dir, weights_file)),
+        }
+        if tflite:
+            tflite_file = f"{name}.tflite"
+            converter = tf.lite.TFLiteConverter.from_keras_model(model)
+            with open(os.path.join(bundle_dir, tflite_file), "wb") as f:
+                f.write(converter.convert())
+            entry["tflite"] = tflite_file
+        models[name] = entry
+
+    files = sorted(f for f in os.listdir(bundle_dir))
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": version,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "tensorflow": tf.__version__,
+        "class_index": "imagenet_class_index.json",
+        "models": models,
+        "sha256": {f: _sha256(os.path.join(bundle_dir, f)) for f in files},
+    }
+    with open(os.path.join(bundle_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    with open(os.path.join(out_dir, CURRENT), "w") as f:
+        f.write(version)
+    return bundle_dir
+
+
+def resolve_bundle(path: str) -> str:
+    """Accept either a version directory or a bundle root with a ``current`` pointer."""
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        return path
+    pointer = os.path.join(path, CURRENT)
+    if os.path.exists(pointer):
+        with open(pointer) as f:
+            return os.path.join(path, f.read().strip())
+    raise FileNotFoundError(f"No model bundle found at {path}")
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(os.path.join(resolve_bundle(path), MANIFEST)) as f:
+        return json.load(f)
+
+
+# (real path, size, mtime_ns) of files whose checksum already matched in this process
+_verified: Set[Tuple[str, int, int]] = set()
+_verified_lock = threading.Lock()
+
+
+def _file_key(file_path: str) -> Tuple[str, int, int]:
+    st = os.stat(file_path)
+    return os.path.realpath(file_path), st.st_size, st.st_mtime_ns
+
+
+def verify_bundle(path: str, files: Optional[List[str]] = None, cached: bool = False) -> List[str]:
+    """Return the files whose checksum does not match the manifest (empty when intact).
+
+    ``files`` limits the check to those manifest entries. With ``cached``, a
+    file that already matched in this process and has not changed since
+    (same size and mtime) is not hashed again.
+    """
+    bundle_dir = resolve_bundle(path)
+    manifest = read_manifest(bundle_dir)
+    bad: List[str] = []
+    for name in files if files is not None else list(manifest["sha256"]):
+        file_path = os.path.join(bundle_dir, name)
+        if not os.path.exists(file_path) or name not in manifest["sha256"]:
+            bad.append(name)
+            continue
+        key = _file_key(file_path)
+        if cached:
+            with _verified_lock:
+                if key in _verified:
+                    continue
+        if _sha256(file_path) != manifest["sha256"][name]:
+            bad.append(name)
+        else:
+            with _verified_lock:
+                _verified.add(key)
+    return bad
+
+
+def _class_index_decoder(class_index_path: str):
+    with open(class_index_path) as f:
+        index = json.load(f)
+    wnids = [index[str(i)][0] for i in range(len(index))]
+    names = [index[str(i)][1] for i in range(len(index))]
+
+    def decode(preds: np.ndarray, top: int = 10):
+        results = []
+        for row in np.asarray(preds):
+            best = np.argsort(row)[::-1][:top]
+            results.append([(wnids[i], names[i], float(row[i])) for i in best])
+        return results
+
+    return decode
+
+
+class TFLiteModel:
+    """Minimal ``predict`` adapter over a TFLite interpreter (not thread-safe)."""
+
+    def __init__(self, path: str, params: int = 0) -> None:
+        _require_tensorflow()
+        self._interpreter = tf.lite.Interpreter(model_path=path)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch = None
+        self._params = params
+
+    def predict(self, x: np.ndarray, verbose: int = 0) -> np.ndarray:
+        x = np.asarray(x, dtype=self._input["dtype"])
+        if self._batch != x.shape[0]:
+            self._interpreter.resize_tensor_input(self._input["index"], list(x.shape))
+            self._interpreter.allocate_tensors()
+            self._batch = x.shape[0]
+        self._interpreter.set_tensor(self._input["index"], x)
+        self._interpreter.invoke()
+        return self._interpreter.get_tensor(self._output["index"]).copy()
+
+    def count_params(self) -> int:
+        return self._params
+
+
+def load_bundle(
+    path: str,
+    model_name: str = DEFAULT_MODEL,
+    runtime: str = "keras",
+    verify: bool = True,
+    warmup: bool = True,
+) -> Tuple[Any, ModelSpec]:
+    """Load a model from a local bundle without network access.
+
+    Keras weights are read through a memmap and copied straight into the
+    model's variables, which saves one full intermediate buffer but still
+    leaves the weights in ordinary process memory. ``runtime="tflite"`` uses
+    the converted model instead; TFLite's interpreter maps the ``.tflite``
+    file itself and runs from the mapped pages. The returned spec decodes
+    labels with the bundled class index. ``verify`` checks only the files
+    this load reads, once per process for each unchanged file.
+    """
+    _require_tensorflow()
+    bundle_dir = resolve_bundle(path)
+    manifest = read_manifest(bundle_dir)
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')!r} in {bundle_dir}")
+    if model_name not in manifest["models"]:
+        raise ValueError(f"Model '{model_name}' is not in bundle {bundle_dir}")
+    entry = manifest["models"][model_name]
+    if verify:
+        # Only what this load reads, and only once per process: reloads after an eviction stay cheap
+        model_file = entry["tflite"] if runtime == "tflite" and "tflite" in entry else entry["weights"]
+        bad = verify_bundle(bundle_dir, files=[manifest["class_index"], model_file], cached=True)
+        if bad:
+            raise ValueError(f"Checksum mismatch in bundle {bundle_dir}: {', '.join(bad)}")
+
+    spec = dataclasses.replace(
+        get_model_spec(model_name),
+        decode=_class_index_decoder(os.path.join(bundle_dir, manifest["class_index"])),
+    )
+
+    if runtime == "tflite":
+        if "tflite" not in entry:
+            raise ValueError(f"Bundle {bundle_dir} has no TFLite export for '{model_name}'")
+        model = TFLiteModel(os.path.join(bundle_dir, entry["tflite"]), params=entry["params"])
+    elif runtime == "keras":
+        model = spec.load(weights=None)
+        # set_weights copies each slice into a TF variable; the memmap only avoids reading the file into one big buffer first
+        flat = np.memmap(os.path.join(bundle_dir, entry["weights"]), dtype=np.float32, mode="r")
+        model.set_weights(
+            [
+                flat[t["offset"] // 4:t["offset"] // 4 + int(np.prod(t["shape"], dtype=np.int64))].reshape(t["shape"])
+                for t in entry["tensors"]
+            ]
+        )
+    else:
+        raise ValueError(f"Unknown runtime '{runtime}', expected 'keras' or 'tflite'")
+
+    if warmup:
+        warmup_model(model, spec)
+    return model, spec
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export or verify an offline model bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Write a new bundle version (needs network once)")
+    export.add_argument("out_dir")
+    export.add_argument("--models", nargs="*", default=None, help="Zoo models to include")
+    export.add_argument("--version", default=None)
+    export.add_argument("--tflite", action="store_true", help="Also export TFLite conversions")
+
+    verify = sub.add_parser("verify", help="Check bundle checksums")
+    verify.add_argument("path")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        print(export_bundle(args.out_dir, args.models, args.version, args.tflite))
+    else:
+        mismatched = verify_bundle(args.path)
+        if mismatched:
+            raise SystemExit(f"checksum mismatch: {', '.join(mismatched)}")
+        print(f"{resolve_bundle(args.path)}: ok")
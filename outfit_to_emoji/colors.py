@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
@@ -34,6 +34,16 @@ BASIC_COLOR_NAMES = {
 }
 
 
+_PALETTE_NAMES: List[str] = list(BASIC_COLOR_NAMES)
+_PALETTE = np.array(list(BASIC_COLOR_NAMES.values()), dtype=np.float64)
+
+
+def _closest_color_names(rgb: np.ndarray) -> List[str]:
+    """Vectorized ``_closest_color_name`` for an (M, 3) array of colors."""
+    d2 = ((rgb[:, None, :].astype(np.float64) - _PALETTE[None, :, :]) ** 2).sum(axis=-1)
+    return [_PALETTE_NAMES[i] for i in np.argmin(d2, axis=1)]
+
+
 def _closest_color_name(rgb: Tuple[int, int, int]) -> str:
     arr = np.array(rgb)
     min_dist = float("inf")
@@ -46,18 +56,66 @@ def _closest_color_name(rgb: Tuple[int, int, int]) -> str:
     return best
 
 
-def extract_dominant_colors(img: Image.Image, num_colors: int = 4) -> List[NamedColor]:
-    small = img.convert("RGB").resize((128, 128))
-    data = np.array(small).reshape(-1, 3)
+THUMBNAIL_SIZE = 128
 
-    n_clusters = max(1, min(num_colors, len(np.unique(data, axis=0))))
-    kmeans = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
-    labels = kmeans.fit_predict(data)
-    centers = kmeans.cluster_centers_.astype(int)
 
-    # Order by cluster size descending
-    counts = np.bincount(labels)
-    order = np.argsort(counts)[::-1]
+def _thumbnail(img: Image.Image) -> np.ndarray:
+    return np.array(img.convert("RGB").resize((THUMBNAIL_SIZE, THUMBNAIL_SIZE)))
+
+
+def subject_mask(
+    thumb: np.ndarray,
+    keep_fraction: float = 0.6,
+    border: int = 8,
+    center_sigma: float = 0.45,
+    background_share: float = 0.02,
+) -> np.ndarray:
+    """Boolean HxW mask of likely subject (outfit) pixels in an RGB thumbnail.
+
+    Combines a center-weighted prior with a background model built from the
+    colors found along the image border: pixels whose coarse color bin is
+    common on the border are treated as wall/floor/sky. Keeps at most
+    ``keep_fraction`` of the pixels; falls back to the full frame when too
+    little survives.
+    """
+    h, w, _ = thumb.shape
+    q = thumb.astype(np.int32) >> 5  # 8 levels per channel -> 512 color bins
+    bins = (q[..., 0] << 6) | (q[..., 1] << 3) | q[..., 2]
+
+    edge = np.zeros((h, w), dtype=bool)
+    edge[:border, :] = edge[-border:, :] = True
+    edge[:, :border] = edge[:, -border:] = True
+    hist = np.bincount(bins[edge], minlength=512) / edge.sum()
+    background = np.minimum(1.0, hist[bins] / background_share)
+
+    ys = np.linspace(-1.0, 1.0, h)[:, None]
+    xs = np.linspace(-1.0, 1.0, w)[None, :]
+    prior = np.exp(-(xs ** 2 + ys ** 2) / (2 * center_sigma ** 2))
+
+    saliency = (0.25 + 0.75 * prior) * (1.0 - background)
+    cutoff = np.quantile(saliency, 1.0 - keep_fraction)
+    mask = saliency > cutoff
+    if mask.sum() < 0.1 * h * w:
+        return np.ones((h, w), dtype=bool)
+    return mask
+
+
+def _thumbnail_pixels(img: Image.Image, mask_background: bool = False) -> np.ndarray:
+    return _subject_pixels(_thumbnail(img), mask_background)
+
+
+def _subject_pixels(thumb: np.ndarray, mask_background: bool = False) -> np.ndarray:
+    if mask_background:
+        return thumb[subject_mask(thumb)]
+    return thumb.reshape(-1, 3)
+
+
+def _named_colors(centers: np.ndarray, labels: np.ndarray, num_colors: int) -> List[NamedColor]:
+    centers = centers.astype(int)
+
+    # Order by cluster size descending; clusters left without pixels are not colors of this image
+    counts = np.bincount(labels, minlength=len(centers))
+    order = [i for i in np.argsort(counts)[::-1] if counts[i] > 0]
     ordered_centers = centers[order]
 
     results: List[NamedColor] = []
@@ -67,16 +125,270 @@ def extract_dominant_colors(img: Image.Image, num_colors: int = 4) -> List[Named
     return results
 
 
+def _fit_kmeans(data: np.ndarray, num_colors: int) -> KMeans:
+    n_clusters = max(1, min(num_colors, len(np.unique(data, axis=0))))
+    kmeans = KMeans(n_clusters=n_clusters, n_init=10, random_state=42)
+    kmeans.fit(data)
+    return kmeans
+
+
+def extract_dominant_colors(
+    img: Image.Image, num_colors: int = 4, mask_background: bool = False
+) -> List[NamedColor]:
+    """Dominant colors, largest cluster first.
+
+    With ``mask_background`` only pixels kept by ``subject_mask`` are clustered.
+    """
+    return extract_dominant_colors_from_thumbnail(_thumbnail(img), num_colors, mask_background)
+
+
+def extract_dominant_colors_from_thumbnail(
+    thumb: np.ndarray, num_colors: int = 4, mask_background: bool = False
+) -> List[NamedColor]:
+    """``extract_dominant_colors`` on a precomputed THUMBNAIL_SIZE square uint8 RGB array."""
+    kmeans = _fit_kmeans(_subject_pixels(thumb, mask_background), num_colors)
+    return _named_colors(kmeans.cluster_centers_, kmeans.labels_, num_colors)
+
+
+def _assign(data: np.ndarray, centers: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Nearest-center labels and mean squared distance per pixel."""
+    d2 = (
+        np.einsum("ij,ij->i", data, data)[:, None]
+        - 2.0 * data @ centers.T
+        + np.einsum("ij,ij->i", centers, centers)[None, :]
+    )
+    labels = np.argmin(d2, axis=1)
+    inertia = float(np.maximum(d2[np.arange(len(data)), labels], 0.0).mean())
+    return labels, inertia
+
+
+def _lloyd(data: np.ndarray, centers: np.ndarray, max_iter: int, tol: float) -> np.ndarray:
+    """Lloyd iterations from the given centers; empty clusters keep their old center."""
+    k = len(centers)
+    for _ in range(max_iter):
+        labels, _ = _assign(data, centers)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=data[:, ch], minlength=k) for ch in range(3)], axis=1)
+        new_centers = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        shift = float(np.abs(new_centers - centers).max())
+        centers = new_centers
+        if shift <= tol:
+            break
+    return centers
+
+
+class IncrementalColorExtractor:
+    """Dominant colors for a sequence of similar images (bursts, angles, video frames).
+
+    Each image is clustered starting from the previous image's centers, which
+    usually converges in a few iterations. A full ``extract_dominant_colors``-style
+    fit runs only for the first image and whenever the palette drifts, i.e. the
+    previous centers fit the new pixels clearly worse than they fit the last image,
+    a color disappears (a cluster ends up empty), or an image has more distinct
+    colors than the last cold fit could use.
+    """
+
+    def __init__(
+        self,
+        num_colors: int = 4,
+        drift_threshold: float = 0.25,
+        drift_floor: float = 50.0,
+        max_iter: int = 20,
+        tol: float = 0.5,
+        batch_pixels: Optional[int] = None,
+        seed: int = 42,
+        mask_background: bool = False,
+    ) -> None:
+        self.num_colors = num_colors
+        self.mask_background = mask_background
+        self.drift_threshold = drift_threshold
+        # Absolute slack (squared RGB distance) so near-flat images do not count as drift
+        self.drift_floor = drift_floor
+        self.max_iter = max_iter
+        self.tol = tol
+        # When set, warm updates fit on a random subsample of this many pixels (mini-batch)
+        self.batch_pixels = batch_pixels
+        self.stats: Dict[str, int] = {"cold": 0, "warm": 0}
+        self._rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self) -> None:
+        self.centers: Optional[np.ndarray] = None
+        self._inertia = 0.0
+
+    def extract(self, img: Image.Image) -> List[NamedColor]:
+        data = _thumbnail_pixels(img, self.mask_background).astype(np.float64)
+        if self.centers is not None and not self._needs_more_clusters(data):
+            _, inertia = _assign(data, self.centers)
+            limit = self._inertia * (1.0 + self.drift_threshold) + self.drift_floor
+            if inertia <= limit:
+                warm = self._warm(data)
+                if warm is not None:
+                    return warm
+        return self._cold(data)
+
+    def _needs_more_clusters(self, data: np.ndarray) -> bool:
+        # The last cold fit had fewer distinct colors than num_colors; refit once this image has more
+        k = len(self.centers)
+        return k < self.num_colors and len(np.unique(data, axis=0)) > k
+
+    def _cold(self, data: np.ndarray) -> List[NamedColor]:
+        kmeans = _fit_kmeans(data, self.num_colors)
+        self.centers = kmeans.cluster_centers_.astype(np.float64)
+        self._inertia = float(kmeans.inertia_) / len(data)
+        self.stats["cold"] += 1
+        return _named_colors(kmeans.cluster_centers_, kmeans.labels_, self.num_colors)
+
+    def _warm(self, data: np.ndarray) -> Optional[List[NamedColor]]:
+        """Warm-started update, or None when a cluster lost all its pixels (a color vanished)."""
+        fit_data = data
+        if self.batch_pixels is not None and self.batch_pixels < len(data):
+            fit_data = data[self._rng.choice(len(data), self.batch_pixels, replace=False)]
+        centers = _lloyd(fit_data, self.centers, self.max_iter, self.tol)
+        labels, inertia = _assign(data, centers)
+        if np.bincount(labels, minlength=len(centers)).min() == 0:
+            # Inertia does not rise when a color disappears, so treat it as drift
+            return None
+        self.centers, self._inertia = centers, inertia
+        self.stats["warm"] += 1
+        return _named_colors(self.centers, labels, self.num_colors)
+
+
+def _batch_kmeans_pp(x: np.ndarray, w: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    """Greedy k-means++ seeding for every image at once. x: (N, P, 3), w: (N, P) pixel weights.
+
+    Like scikit-learn, each step draws a few candidates and keeps the one that
+    lowers the total potential most, which avoids most poor local optima.
+    """
+    n, p, _ = x.shape
+    rows = np.arange(n)
+    trials = 2 + int(np.log(k))
+
+    def sample(prob: np.ndarray) -> np.ndarray:
+        cdf = np.cumsum(prob, axis=1)
+        u = rng.random(n) * cdf[:, -1]
+        return np.minimum((cdf < u[:, None]).sum(axis=1), p - 1)
+
+    centers = np.empty((n, k, 3), dtype=x.dtype)
+    centers[:, 0] = x[rows, sample(w)]
+    d2 = ((x - centers[:, :1]) ** 2).sum(axis=-1)
+    for j in range(1, k):
+        # Fall back to weight-only sampling for images with a single distinct color
+        prob = np.where((d2 * w).sum(axis=1, keepdims=True) > 0, d2 * w, w)
+        best_d2, best_potential = d2, None
+        for _ in range(trials):
+            candidate = x[rows, sample(prob)]
+            cand_d2 = np.minimum(d2, ((x - candidate[:, None, :]) ** 2).sum(axis=-1))
+            potential = (cand_d2 * w).sum(axis=1)
+            better = potential < best_potential if best_potential is not None else np.ones(n, dtype=bool)
+            centers[better, j] = candidate[better]
+            best_d2 = np.where(better[:, None], cand_d2, best_d2)
+            best_potential = potential if best_potential is None else np.where(better, potential, best_potential)
+        d2 = best_d2
+    return centers
+
+
+def _batch_lloyd(
+    x: np.ndarray, w: np.ndarray, centers: np.ndarray, max_iter: int, tol: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Lloyd iterations for all images together; returns centers and weighted cluster sizes.
+
+    Distances and per-cluster sums are batched matmuls; images drop out of the
+    working set as soon as their centers stop moving.
+    """
+    n, _, _ = x.shape
+    k = centers.shape[1]
+    ks = np.arange(k)
+    xw = x * w[..., None]
+    x_sq = np.einsum("npc,npc->np", x, x)
+    counts = np.zeros((n, k), dtype=x.dtype)
+    active = np.arange(n)
+    for _ in range(max_iter):
+        c = centers[active]
+        d2 = x_sq[active, :, None] - 2.0 * np.matmul(x[active], c.transpose(0, 2, 1)) + (c * c).sum(axis=-1)[:, None, :]
+        onehot = (np.argmin(d2, axis=2)[..., None] == ks).astype(x.dtype)  # (A, P, K)
+        onehot_t = onehot.transpose(0, 2, 1)
+        cnt = np.matmul(onehot_t, w[active][..., None])[..., 0]
+        sums = np.matmul(onehot_t, xw[active])
+        new_c = np.where(cnt[..., None] > 0, sums / np.maximum(cnt, 1e-12)[..., None], c)
+        shift = np.abs(new_c - c).max(axis=(1, 2))
+        centers[active] = new_c
+        counts[active] = cnt
+        active = active[shift > tol]
+        if not len(active):
+            break
+    return centers, counts
+
+
+def extract_dominant_colors_batch(
+    images: List[Image.Image],
+    num_colors: int = 4,
+    max_iter: int = 30,
+    tol: float = 0.5,
+    chunk_size: int = 64,
+    mask_background: bool = False,
+    seed: int = 42,
+) -> List[List[NamedColor]]:
+    """``extract_dominant_colors`` for many images with one set of batched numpy ops.
+
+    Thumbnails are stacked into an (N, P, 3) array and k-means++ seeding,
+    Lloyd iterations and palette naming run for all of them at once; masked-out
+    background pixels simply get zero weight. Uses a single seeding instead of
+    ``n_init=10``, so centers can differ slightly from the per-image function.
+    Images are processed ``chunk_size`` at a time to bound memory.
+    """
+    thumbs = [_thumbnail(img) for img in images]
+    return extract_dominant_colors_from_thumbnails(
+        thumbs, num_colors, max_iter=max_iter, tol=tol, chunk_size=chunk_size,
+        mask_background=mask_background, seed=seed,
+    )
+
+
+def extract_dominant_colors_from_thumbnails(
+    thumbnails: List[np.ndarray],
+    num_colors: int = 4,
+    max_iter: int = 30,
+    tol: float = 0.5,
+    chunk_size: int = 64,
+    mask_background: bool = False,
+    seed: int = 42,
+) -> List[List[NamedColor]]:
+    """Batched extraction from precomputed 128x128x3 uint8 thumbnails."""
+    rng = np.random.default_rng(seed)
+    results: List[List[NamedColor]] = []
+    for start in range(0, len(thumbnails), chunk_size):
+        thumbs = np.stack(thumbnails[start:start + chunk_size])
+        n = len(thumbs)
+        x = thumbs.reshape(n, -1, 3).astype(np.float32)
+        if mask_background:
+            w = np.stack([subject_mask(t) for t in thumbs]).reshape(n, -1).astype(np.float32)
+        else:
+            w = np.ones(x.shape[:2], dtype=np.float32)
+
+        centers, counts = _batch_lloyd(x, w, _batch_kmeans_pp(x, w, num_colors, rng), max_iter, tol)
+        order = np.argsort(-counts, axis=1, kind="stable")
+        centers = np.take_along_axis(centers, order[..., None], axis=1).astype(int)
+        counts = np.take_along_axis(counts, order, axis=1)
+        names = _closest_color_names(centers.reshape(-1, 3))
+
+        for i in range(n):
+            colors: List[NamedColor] = []
+            seen = set()
+            for j in range(num_colors):
+                rgb = tuple(int(v) for v in centers[i, j])
+                # Empty or duplicate clusters (images with few distinct colors) are dropped
+                if counts[i, j] <= 0 or rgb in seen:
+                    continue
+                seen.add(rgb)
+                colors.append(NamedColor(name=names[i * num_colors + j], rgb=rgb))
+            results.append(colors)
+    return results
+
+
 def render_color_badges(colors: List[NamedColor]) -> str:
-    badges = []
-    for c in colors:
-        badges.append(
-            f"<span style='display:inline-flex;align-items:center;gap:8px;margin:4px 10px 4px 0;padding:6px 10px;border-radius:10px;border:1px solid #e5e7eb;background:rgba(255,255,255,0.9)'>"
-            f"<span style='display:inline-block;width:18px;height:18px;background:{c.hex};border:1px solid #d1d5db; clip-path: polygon(25% 6.7%, 75% 6.7%, 100% 50%, 75% 93.3%, 25% 93.3%, 0% 50%);'></span>"
-            f"<span style='font-size:0.95rem;text-transform:capitalize'>{c.name}</span>"
-            f"</span>"
-        )
-    return "".join(badges)
+    from .rendering import color_badges_html
+
+    return color_badges_html(colors)
 
 
 
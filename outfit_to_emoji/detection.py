@@ -1,42 +1,37 @@
 from __future__ import annotations
 
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 from PIL import Image
 
-try:
-    from tensorflow.keras.applications.mobilenet_v2 import (
-        MobileNetV2,
-        decode_predictions,
-        preprocess_input,
-    )
-    from tensorflow.keras.preprocessing import image as keras_image
-    TENSORFLOW_AVAILABLE = True
-except Exception:  # pragma: no cover - optional dep guard
-    TENSORFLOW_AVAILABLE = False
-    MobileNetV2 = None  # type: ignore
-    decode_predictions = None  # type: ignore
-    preprocess_input = None  # type: ignore
-    keras_image = None  # type: ignore
-
-
-def load_imagenet_model():
+from .zoo import DEFAULT_MODEL, TENSORFLOW_AVAILABLE, ModelSpec, get_model_spec
+
+
+def load_imagenet_model(name: str = DEFAULT_MODEL):
     if not TENSORFLOW_AVAILABLE:
         raise RuntimeError(
             "TensorFlow/Keras not available. Please install tensorflow to run detection."
         )
-    return MobileNetV2(weights="imagenet")
+    return get_model_spec(name).load()
 
 
-def _prepare_image(img: Image.Image) -> np.ndarray:
-    img_resized = img.resize((224, 224))
+def _prepare_image(img: Image.Image, spec: Optional[ModelSpec] = None) -> np.ndarray:
+    spec = spec or get_model_spec()
+    img_resized = img.resize((spec.input_size, spec.input_size))
     x = np.array(img_resized)
     x = np.expand_dims(x, axis=0)
-    x = preprocess_input(x)
+    x = spec.preprocess(x)
     return x
 
 
+def warmup_model(model, spec: Optional[ModelSpec] = None, batch_size: int = 1) -> None:
+    """Run one predict on a dummy batch so graph tracing happens before real traffic."""
+    spec = spec or get_model_spec()
+    dummy = np.zeros((batch_size, spec.input_size, spec.input_size, 3), dtype=np.uint8)
+    model.predict(spec.preprocess(dummy), verbose=0)
+
+
 # A small set of ImageNet synsets roughly associated with clothing/outfit cues
 CLOTHING_KEYWORDS = {
     "jersey",
@@ -79,18 +74,39 @@ def _filter_clothing(preds: List[Tuple[str, str, float]], top_k: int = 5) -> Lis
     return clothing[:top_k]
 
 
-def detect_clothing_items(img: Image.Image, model, top_k: int = 5) -> List[Tuple[str, float]]:
+def detect_clothing_items(
+    img: Image.Image, model, top_k: int = 5, spec: Optional[ModelSpec] = None
+) -> List[Tuple[str, float]]:
     """Return [(label, probability)] for clothing-like ImageNet classes.
 
-    Falls back to empty list on errors.
+    ``spec`` describes ``model`` (input size, preprocessing, label decoding) and
+    defaults to the stock MobileNetV2. Falls back to empty list on errors.
     """
+    spec = spec or get_model_spec()
     try:
-        x = _prepare_image(img)
+        x = _prepare_image(img, spec)
         preds = model.predict(x)
-        decoded = decode_predictions(preds, top=10)[0]
+        decoded = spec.decode(preds, top=10)[0]
         return _filter_clothing(decoded, top_k=top_k)
     except Exception:
         return []
 
 
+def detect_clothing_items_batch(
+    batch: np.ndarray, model, top_k: int = 5, spec: Optional[ModelSpec] = None
+) -> List[List[Tuple[str, float]]]:
+    """``detect_clothing_items`` for an (N, size, size, 3) uint8 batch in one predict call.
+
+    Images must already be resized to ``spec.input_size``. Falls back to empty
+    lists on errors.
+    """
+    spec = spec or get_model_spec()
+    try:
+        preds = model.predict(spec.preprocess(batch), verbose=0)
+        decoded = spec.decode(preds, top=10)
+    except Exception:
+        return [[] for _ in range(len(batch))]
+    return [_filter_clothing(d, top_k=top_k) for d in decoded]
+
+
 
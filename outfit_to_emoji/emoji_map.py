@@ -125,13 +125,9 @@ def map_items_and_colors_to_emojis(
     return final, {"items": item_emojis, "colors": color_emojis, "location": [location_emoji]}
 
 def render_color_emoji_chips(colors: List[NamedColor]) -> str:
-    chips: List[str] = []
-    for i, c in enumerate(colors):
-        emoji = get_color_emoji(c.name, i)
-        chips.append(
-            f"<span class='color-badge'>{emoji} <span style='text-transform:capitalize'>{c.name}</span></span>"
-        )
-    return "".join(chips)
+    from .rendering import color_chips_html
+
+    return color_chips_html(colors)
 
 
 
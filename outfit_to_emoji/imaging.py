@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+import io
+
+from PIL import Image
+
+
+def read_image_from_bytes(uploaded_bytes: bytes) -> Image.Image:
+    return Image.open(io.BytesIO(uploaded_bytes)).convert("RGB")
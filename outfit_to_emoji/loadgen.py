@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .pipeline import analyze_outfit_sync
+from .zoo import ModelSpec, current_rss_bytes
+
+# A target analyzes one image and returns its per-stage timings in seconds
+Target = Callable[[bytes], Dict[str, float]]
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Log-spaced latency buckets from 1 ms to 60 s
+HISTOGRAM_EDGES_MS = np.geomspace(1.0, 60_000.0, 33)
+
+
+def load_images(directory: str) -> List[bytes]:
+    images: List[bytes] = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            with open(os.path.join(directory, name), "rb") as f:
+                images.append(f.read())
+    if not images:
+        raise ValueError(f"No {'/'.join(IMAGE_EXTENSIONS)} images found in {directory}")
+    return images
+
+
+class _SerializedModel:
+    """Funnels predict() through a lock; one Keras model must not predict concurrently."""
+
+    def __init__(self, model) -> None:
+        self._model = model
+        self._lock = threading.Lock()
+
+    def predict(self, *args, **kwargs):
+        with self._lock:
+            return self._model.predict(*args, **kwargs)
+
+
+def in_process_target(
+    model, spec: Optional[ModelSpec] = None, top_k: int = 5, num_colors: int = 4
+) -> Target:
+    shared = _SerializedModel(model) if model is not None else None
+
+    def run(image_bytes: bytes) -> Dict[str, float]:
+        result = analyze_outfit_sync(image_bytes, shared, spec=spec, top_k=top_k, num_colors=num_colors)
+        return result.timings
+
+    return run
+
+
+def http_target(url: str, timeout: float = 30.0) -> Target:
+    """POST raw image bytes to ``url``; stage timings are read from a JSON ``timings`` field if present."""
+
+    def run(image_bytes: bytes) -> Dict[str, float]:
+        request = urllib.request.Request(
+            url, data=image_bytes, method="POST", headers={"Content-Type": "application/octet-stream"}
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            body = response.read()
+        try:
+            timings = json.loads(body).get("timings", {})
+        except (ValueError, AttributeError):
+            return {}
+        return {k: float(v) for k, v in timings.items()} if isinstance(timings, dict) else {}
+
+    return run
+
+
+@dataclass
+class LoadResult:
+    mode: str
+    level: float
+    requests: int
+    errors: int
+    duration_s: float
+    latencies_ms: List[float] = field(default_factory=list, repr=False)
+    stage_ms: Dict[str, List[float]] = field(default_factory=dict, repr=False)
+    rss_start_mb: Optional[float] = None
+    rss_end_mb: Optional[float] = None
+    # Successful requests finished within ``duration_s``; all of them when None
+    completed: Optional[int] = None
+
+    @property
+    def throughput_rps(self) -> float:
+        completed = self.requests - self.errors if self.completed is None else self.completed
+        return completed / self.duration_s if self.duration_s > 0 else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def rss_growth_mb(self) -> Optional[float]:
+        if self.rss_start_mb is None or self.rss_end_mb is None:
+            return None
+        return self.rss_end_mb - self.rss_start_mb
+
+    def percentile(self, q: float, stage: Optional[str] = None) -> float:
+        values = self.stage_ms.get(stage, []) if stage else self.latencies_ms
+        return float(np.percentile(values, q)) if values else float("nan")
+
+    def histogram(self, stage: Optional[str] = None) -> List[Tuple[float, int]]:
+        """(upper bucket edge in ms, count) for end-to-end latency, or for one stage."""
+        values = self.stage_ms.get(stage, []) if stage else self.latencies_ms
+        counts, edges = np.histogram(values, bins=HISTOGRAM_EDGES_MS)
+        return [(float(e), int(c)) for e, c in zip(edges[1:], counts) if c]
+
+    @property
+    def power(self) -> float:
+        # Kleinrock's power: throughput over mean delay, maximal at the knee
+        if not self.latencies_ms:
+            return 0.0
+        return self.throughput_rps / (float(np.mean(self.latencies_ms)) / 1000.0)
+
+
+class _Recorder:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies_ms: List[float] = []
+        self.stage_ms: Dict[str, List[float]] = {}
+        self.finished: List[float] = []
+        self.requests = 0
+        self.errors = 0
+
+    def call(self, target: Target, image_bytes: bytes, started: float) -> None:
+        try:
+            timings = target(image_bytes)
+            ok = True
+        except Exception:
+            timings, ok = {}, False
+        finished = time.perf_counter()
+        elapsed_ms = (finished - started) * 1000.0
+        with self.lock:
+            self.requests += 1
+            if not ok:
+                self.errors += 1
+                return
+            self.latencies_ms.append(elapsed_ms)
+            self.finished.append(finished)
+            for stage, seconds in timings.items():
+                self.stage_ms.setdefault(stage, []).append(seconds * 1000.0)
+
+
+def _finish(
+    mode: str,
+    level: float,
+    recorder: _Recorder,
+    duration_s: float,
+    rss_start: Optional[float],
+    track_rss: bool,
+    completed: Optional[int] = None,
+) -> LoadResult:
+    return LoadResult(
+        mode=mode,
+        level=level,
+        requests=recorder.requests,
+        errors=recorder.errors,
+        duration_s=duration_s,
+        latencies_ms=recorder.latencies_ms,
+        stage_ms=recorder.stage_ms,
+        rss_start_mb=rss_start,
+        rss_end_mb=current_rss_bytes() / 2**20 if track_rss else None,
+        completed=completed,
+    )
+
+
+def run_concurrency(
+    target: Target, images: List[bytes], concurrency: int, duration_s: float = 20.0, track_rss: bool = True
+) -> LoadResult:
+    """Closed loop: ``concurrency`` clients each send the next image as soon as the previous one returns."""
+    recorder = _Recorder()
+    rss_start = current_rss_bytes() / 2**20 if track_rss else None
+    deadline = time.perf_counter() + duration_s
+    cursor = iter(range(1 << 62))
+
+    def client() -> None:
+        while time.perf_counter() < deadline:
+            image = images[next(cursor) % len(images)]
+            recorder.call(target, image, time.perf_counter())
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return _finish("concurrency", concurrency, recorder, time.perf_counter() - t0, rss_start, track_rss)
+
+
+def run_rate(
+    target: Target,
+    images: List[bytes],
+    rate_rps: float,
+    duration_s: float = 20.0,
+    max_in_flight: int = 256,
+    track_rss: bool = True,
+) -> LoadResult:
+    """Open loop: requests arrive every ``1 / rate_rps`` seconds regardless of how fast they complete.
+
+    Latency is measured from each request's scheduled arrival time, so a backlog
+    shows up as latency instead of silently lowering the offered load.
+    Throughput counts only what finished within the arrival window; the
+    drain of the backlog afterwards would otherwise understate it exactly
+    at the overloaded levels the knee is picked from.
+    """
+    if rate_rps <= 0:
+        raise ValueError(f"rate_rps must be positive, got {rate_rps}")
+    recorder = _Recorder()
+    rss_start = current_rss_bytes() / 2**20 if track_rss else None
+    interval = 1.0 / rate_rps
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="outfit-load") as pool:
+        i = 0
+        while True:
+            scheduled = t0 + i * interval
+            if scheduled - t0 >= duration_s:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(recorder.call, target, images[i % len(images)], scheduled)
+            i += 1
+    window_s = i * interval
+    window_end = t0 + window_s
+    completed = sum(1 for finished in recorder.finished if finished <= window_end)
+    return _finish("rate", rate_rps, recorder, window_s, rss_start, track_rss, completed=completed)
+
+
+def sweep(
+    target: Target,
+    images: List[bytes],
+    levels: List[float],
+    mode: str = "concurrency",
+    duration_s: float = 20.0,
+    track_rss: bool = True,
+) -> List[LoadResult]:
+    results: List[LoadResult] = []
+    for level in levels:
+        if mode == "concurrency":
+            results.append(run_concurrency(target, images, int(level), duration_s, track_rss=track_rss))
+        elif mode == "rate":
+            results.append(run_rate(target, images, float(level), duration_s, track_rss=track_rss))
+        else:
+            raise ValueError(f"Unknown load mode '{mode}', expected 'concurrency' or 'rate'")
+    return results
+
+
+def find_knee(results: List[LoadResult]) -> Optional[LoadResult]:
+    """Load level past which extra load mostly buys latency instead of throughput."""
+    candidates = [r for r in results if r.latencies_ms]
+    return max(candidates, key=lambda r: r.power) if candidates else None
+
+
+def format_report(results: List[LoadResult]) -> str:
+    knee = find_knee(results)
+    stages = sorted({s for r in results for s in r.stage_ms})
+    header = f"{'mode':<12}{'level':>7}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'err %':>7}{'ΔRSS MB':>9}"
+    header += "".join(f"{s[:10] + ' p99':>16}" for s in stages)
+    lines = [header]
+    for r in results:
+        growth = r.rss_growth_mb
+        line = (
+            f"{r.mode:<12}{r.level:>7g}{r.throughput_rps:>9.2f}{r.percentile(50):>9.1f}"
+            f"{r.percentile(99):>9.1f}{r.error_rate * 100:>7.1f}"
+            f"{(f'{growth:.1f}' if growth is not None else '-'):>9}"
+        )
+        line += "".join(f"{r.percentile(99, s):>16.1f}" for s in stages)
+        if r is knee:
+            line += "  <- knee"
+        lines.append(line)
+    if knee is not None:
+        lines.append("")
+        lines.append(
+            f"Knee at {knee.mode}={knee.level:g}: {knee.throughput_rps:.2f} req/s, "
+            f"p99 {knee.percentile(99):.1f} ms. Size replicas for this load per process."
+        )
+        lines.append("End-to-end latency histogram at the knee (bucket upper edge ms: count):")
+        lines.extend(f"  {edge:>9.1f}: {count}" for edge, count in knee.histogram())
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a directory of images against the pipeline and report capacity.")
+    parser.add_argument("images", help="Directory of .jpg/.jpeg/.png files to replay")
+    level = parser.add_mutually_exclusive_group(required=True)
+    level.add_argument("--concurrency", type=int, nargs="+", help="Closed-loop client counts to sweep")
+    level.add_argument("--rate", type=float, nargs="+", help="Open-loop arrival rates (req/s) to sweep")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per load level")
+    parser.add_argument("--url", default=None, help="POST images to this local HTTP endpoint instead of running in-process")
+    parser.add_argument("--model", default=None, help="Zoo model for in-process detection")
+    parser.add_argument("--colors-only", action="store_true", help="In-process: skip detection")
+    args = parser.parse_args()
+
+    images = load_images(args.images)
+    if args.url:
+        target = http_target(args.url)
+    elif args.colors_only:
+        target = in_process_target(None)
+    else:
+        from .detection import load_imagenet_model
+        from .zoo import DEFAULT_MODEL, get_model_spec
+
+        name = args.model or DEFAULT_MODEL
+        target = in_process_target(load_imagenet_model(name), spec=get_model_spec(name))
+
+    mode, levels = ("concurrency", args.concurrency) if args.concurrency else ("rate", args.rate)
+    print(format_report(sweep(target, images, levels, mode, args.duration, track_rss=not args.url)))
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .colors import NamedColor, extract_dominant_colors_from_thumbnail
+from .detection import detect_clothing_items_batch
+from .emoji_map import map_items_and_colors_to_emojis
+from .imaging import read_image_from_bytes
+from .profiling import ProfileCapture, Profiler, ProfileSummary
+from .views import ImageViews
+from .zoo import ModelSpec, get_model_spec
+
+
+@dataclass
+class AnalysisResult:
+    items: List[Tuple[str, float]]
+    colors: List[NamedColor]
+    emoji: str
+    emoji_parts: Dict[str, List[str]]
+    # Seconds spent per stage: decode, detection, colors, emoji
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Set only when this analysis was picked for profiling
+    profile: Optional[ProfileSummary] = None
+    # True when detection was skipped under load and only colors were mapped
+    degraded: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "items": [{"label": l, "prob": float(p)} for l, p in self.items],
+            "colors": [{"name": c.name, "rgb": c.rgb, "hex": c.hex} for c in self.colors],
+            "emoji": self.emoji,
+            "emoji_parts": self.emoji_parts,
+            "timings": self.timings,
+        }
+        if self.degraded:
+            data["degraded"] = True
+        if self.profile is not None:
+            data["profile"] = self.profile.to_dict()
+        return data
+
+
+def _timed(timings: Dict[str, float], stage: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    t0 = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = time.perf_counter() - t0
+
+
+def _stage(capture: Optional[ProfileCapture]) -> Callable[..., Any]:
+    """``_timed``, additionally registering the running thread with the profiler."""
+    return capture.track(_timed) if capture is not None else _timed
+
+
+def _begin_profile(profiler: Optional[Profiler], profile: bool) -> Optional[ProfileCapture]:
+    return profiler.begin(force=profile) if profiler is not None else None
+
+
+def _detect(views: ImageViews, model, spec: Optional[ModelSpec], top_k: int) -> List[Tuple[str, float]]:
+    if model is None:
+        return []
+    spec = spec or get_model_spec()
+    try:
+        # A batch of one: the uint8 view becomes float only inside spec.preprocess
+        batch = views.model_input(spec.input_size)[np.newaxis]
+    except Exception:
+        return []  # same fallback as detect_clothing_items for images that fail to resize
+    return detect_clothing_items_batch(batch, model, top_k=top_k, spec=spec)[0]
+
+
+def _colors(views: ImageViews, num_colors: int, mask_background: bool) -> List[NamedColor]:
+    return extract_dominant_colors_from_thumbnail(views.thumbnail(), num_colors, mask_background)
+
+
+def _finish(
+    items: List[Tuple[str, float]],
+    colors: List[NamedColor],
+    timings: Dict[str, float],
+    capture: Optional[ProfileCapture],
+    profiler: Optional[Profiler],
+) -> AnalysisResult:
+    emoji_str, emoji_parts = _stage(capture)(timings, "emoji", map_items_and_colors_to_emojis, items, colors)
+    result = AnalysisResult(items=items, colors=colors, emoji=emoji_str, emoji_parts=emoji_parts, timings=timings)
+    if capture is not None and profiler is not None:
+        result.profile = profiler.finish(capture)
+    return result
+
+
+def _analyze_sync(
+    image: Optional[Image.Image],
+    image_bytes: Optional[bytes],
+    model,
+    spec: Optional[ModelSpec],
+    top_k: int,
+    num_colors: int,
+    profiler: Optional[Profiler],
+    profile: bool,
+    mask_background: bool,
+) -> AnalysisResult:
+    timings: Dict[str, float] = {}
+    capture = _begin_profile(profiler, profile)
+    run = _stage(capture)
+    try:
+        if image is None:
+            image = run(timings, "decode", read_image_from_bytes, image_bytes)
+        with ImageViews(image) as views:
+            items = run(timings, "detection", _detect, views, model, spec, top_k)
+            colors = run(timings, "colors", _colors, views, num_colors, mask_background)
+        return _finish(items, colors, timings, capture, profiler)
+    except BaseException:
+        if capture is not None:
+            capture.stop()
+        raise
+
+
+def analyze_image(
+    image: Image.Image,
+    model,
+    spec: Optional[ModelSpec] = None,
+    top_k: int = 5,
+    num_colors: int = 4,
+    profiler: Optional[Profiler] = None,
+    profile: bool = False,
+    mask_background: bool = False,
+) -> AnalysisResult:
+    """Run detection, color extraction and emoji mapping on a decoded image.
+
+    Passing ``model=None`` skips detection and yields a colors-only result.
+    With a ``profiler``, the analysis is stack-sampled when the profiler's
+    1-in-N rate selects it or when ``profile`` is set. ``mask_background``
+    restricts color extraction to the likely subject (see ``subject_mask``).
+    """
+    return _analyze_sync(image, None, model, spec, top_k, num_colors, profiler, profile, mask_background)
+
+
+def analyze_outfit_sync(
+    image_bytes: bytes,
+    model,
+    spec: Optional[ModelSpec] = None,
+    top_k: int = 5,
+    num_colors: int = 4,
+    profiler: Optional[Profiler] = None,
+    profile: bool = False,
+    mask_background: bool = False,
+) -> AnalysisResult:
+    return _analyze_sync(None, image_bytes, model, spec, top_k, num_colors, profiler, profile, mask_background)
+
+
+class _ViewsLease:
+    """Releases an analysis's views once no executor thread can still touch them.
+
+    Cancelling a ``run_in_executor`` future marks it done even while its thread
+    keeps running, so the asyncio side cannot tell when a stage has really
+    finished. Instead each stage checks in and out here: once the analysis is
+    closed, stages that have not started yet are skipped, and the last stage
+    still running releases the views on its way out.
+    """
+
+    def __init__(self, views: ImageViews) -> None:
+        self.views = views
+        self._running = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._closed:
+                return None  # abandoned before it started
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                last = self._closed and self._running == 0
+            if last:
+                self.views.release()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle = self._running == 0
+        if idle:
+            self.views.release()
+
+
+# Keras models are not safe to call predict() on from several threads at once,
+# so detection defaults to a single worker thread shared by all analyses.
+_default_detection_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _detection_executor() -> ThreadPoolExecutor:
+    global _default_detection_executor
+    if _default_detection_executor is None:
+        _default_detection_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outfit-detect")
+    return _default_detection_executor
+
+
+async def analyze_outfit(
+    image_bytes: bytes,
+    model,
+    *,
+    spec: Optional[ModelSpec] = None,
+    top_k: int = 5,
+    num_colors: int = 4,
+    decode_executor: Optional[Executor] = None,
+    detection_executor: Optional[Executor] = None,
+    color_executor: Optional[Executor] = None,
+    timeout: Optional[float] = None,
+    profiler: Optional[Profiler] = None,
+    profile: bool = False,
+    mask_background: bool = False,
+) -> AnalysisResult:
+    """Async pipeline: decode, then detection and colors concurrently, then emoji mapping.
+
+    Blocking stages run on executors (the loop's default executor unless given)
+    so the event loop stays free. On ``timeout`` or cancellation, stages that
+    have not started are cancelled; a stage already running in a thread is
+    left to finish and its result discarded.
+    """
+    loop = asyncio.get_running_loop()
+    timings: Dict[str, float] = {}
+    capture = _begin_profile(profiler, profile)
+    stage = _stage(capture)
+
+    async def run() -> AnalysisResult:
+        image = await loop.run_in_executor(
+            decode_executor, stage, timings, "decode", read_image_from_bytes, image_bytes
+        )
+        views = ImageViews(image)
+        lease = _ViewsLease(views)
+        detection = loop.run_in_executor(
+            detection_executor or _detection_executor(),
+            lease.run, stage, timings, "detection", _detect, views, model, spec, top_k,
+        )
+        colors = loop.run_in_executor(
+            color_executor, lease.run, stage, timings, "colors", _colors, views, num_colors, mask_background
+        )
+        try:
+            items, dominant = await asyncio.gather(detection, colors)
+        except BaseException:
+            detection.cancel()
+            colors.cancel()
+            raise
+        finally:
+            # Releases now, or, after a timeout, when the stage still running in its thread returns
+            lease.close()
+        return _finish(items, dominant, timings, capture, profiler)
+
+    try:
+        if timeout is None:
+            return await run()
+        return await asyncio.wait_for(run(), timeout)
+    except BaseException:
+        if capture is not None:
+            capture.stop()
+        raise
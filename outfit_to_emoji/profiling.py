@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+# Innermost matching frame decides which pipeline stage a sample belongs to
+STAGE_FUNCTIONS: Dict[str, str] = {
+    "read_image_from_bytes": "decode",
+    "_prepare_image": "prepare",
+    "model_input": "prepare",
+    "_mobilenet_v2_preprocess": "prepare",
+    "_passthrough_preprocess": "prepare",
+    "predict": "predict",
+    "detect_clothing_items": "detection",
+    "detect_clothing_items_batch": "detection",
+    "thumbnail": "resize",
+    "palette_thumbnail": "resize",
+    "extract_dominant_colors": "kmeans",
+    "extract_dominant_colors_from_thumbnail": "kmeans",
+    "map_items_and_colors_to_emojis": "emoji",
+}
+
+
+@dataclass
+class ProfileSummary:
+    path: Optional[str]
+    samples: int
+    interval_ms: float
+    # Estimated milliseconds per stage (samples x interval)
+    stages: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "samples": self.samples,
+            "interval_ms": self.interval_ms,
+            "stages_ms": self.stages,
+        }
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)})"
+
+
+class ProfileCapture:
+    """Stack sampler for the threads working on one analysis.
+
+    Only threads currently inside a ``track``-ed call are sampled, so other
+    requests sharing the same executors do not leak into this profile.
+    """
+
+    def __init__(self, interval_s: float = 0.005, max_samples: int = 2000) -> None:
+        self.interval_s = max(0.001, interval_s)
+        self.max_samples = max_samples
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.stage_samples: Counter = Counter()
+        # Approximate size of the distinct stacks collected so far
+        self.nbytes = 0
+        self._on_stop: List[Callable[[], None]] = []
+        self._threads: Counter = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, fn: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(fn)
+        def tracked(*args, **kwargs):
+            ident = threading.get_ident()
+            with self._lock:
+                self._threads[ident] += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._threads[ident] -= 1
+                    if self._threads[ident] <= 0:
+                        del self._threads[ident]
+
+        return tracked
+
+    def start(self) -> "ProfileCapture":
+        self._thread = threading.Thread(target=self._run, name="outfit-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        # May run concurrently (budget eviction and Profiler.finish): every caller
+        # joins the sampler so none returns while it can still record a sample
+        self._stop.set()
+        with self._lock:
+            thread = self._thread
+            callbacks, self._on_stop = self._on_stop, []
+        if thread is not None:
+            thread.join()
+        for callback in callbacks:
+            callback()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            with self._lock:
+                idents = list(self._threads)
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self._record(frame)
+            if self.samples >= self.max_samples:
+                # Hard cap keeps overhead bounded on pathologically slow requests
+                return
+
+    def _record(self, frame) -> None:
+        labels: List[str] = []
+        stage = None
+        while frame is not None:
+            if stage is None:
+                stage = STAGE_FUNCTIONS.get(frame.f_code.co_name)
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        stage = stage or "other"
+        labels.append(f"[{stage}]")
+        key = ";".join(reversed(labels))
+        if key not in self.stacks:
+            self.nbytes += len(key)
+        self.stacks[key] += 1
+        self.stage_samples[stage] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl, inferno and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def write(self, directory: str) -> str:
+        os.makedirs(directory, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.folded"
+        path = os.path.join(directory, name)
+        with open(path, "w") as f:
+            f.write(self.folded())
+        return path
+
+    def summary(self, path: Optional[str] = None) -> ProfileSummary:
+        interval_ms = self.interval_s * 1000.0
+        return ProfileSummary(
+            path=path,
+            samples=self.samples,
+            interval_ms=interval_ms,
+            stages={stage: n * interval_ms for stage, n in self.stage_samples.most_common()},
+        )
+
+
+class Profiler:
+    """Decides which analyses get profiled and where their profiles go.
+
+    Every ``sample_every``-th analysis is captured (0 disables sampling);
+    a request can also force a capture regardless of the rate. With a
+    ``budget`` (a ``resources.MemoryBudget``), running captures count against
+    it and are stopped early when it has to evict them.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "profiles",
+        sample_every: int = 100,
+        interval_s: float = 0.005,
+        max_samples: int = 2000,
+        budget=None,
+    ) -> None:
+        self.output_dir = output_dir
+        self.budget = budget
+        self.sample_every = sample_every
+        self.interval_s = interval_s
+        self.max_samples = max_samples
+        # Starts at 1 so the first analysis of every process is not always the one profiled
+        self._counter = itertools.count(1)
+
+    def should_profile(self, force: bool = False) -> bool:
+        n = next(self._counter)
+        return force or (self.sample_every > 0 and n % self.sample_every == 0)
+
+    def begin(self, force: bool = False) -> Optional[ProfileCapture]:
+        if not self.should_profile(force):
+            return None
+        capture = ProfileCapture(self.interval_s, self.max_samples)
+        if self.budget is not None:
+            name = f"profile:{id(capture)}"
+            self.budget.register(name, lambda: capture.nbytes, capture.stop)
+            capture._on_stop.append(lambda: self.budget.unregister(name))
+        return capture.start()
+
+    def finish(self, capture: ProfileCapture) -> ProfileSummary:
+        capture.stop()
+        path = capture.write(self.output_dir) if capture.samples else None
+        return capture.summary(path)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import html
+import re
+from functools import lru_cache
+from typing import Dict, List, Sequence
+
+from .colors import NamedColor
+from .emoji_map import get_color_emoji
+from .resources import process_budget, register_lru_cache
+
+# Everything static lives here so per-result fragments only carry class names
+CSS_SOURCE = """
+    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
+    .main { font-family: 'Inter', sans-serif; }
+    .stApp { background: #0f172a; }
+    .main-container { padding: 12px 0; }
+    .title-container { text-align:center; margin-bottom: 12px; }
+    .result-card { background: transparent; padding: 0; margin: 10px 0; }
+    .emoji-display { font-size: 2.2rem; text-align:center; padding: 8px; color: #e2e8f0; animation: floatY 2s ease-in-out infinite; }
+    .emoji-location { display:inline-block; animation: pulseGlow 1.6s ease-in-out infinite; }
+    .spinner-container { display:flex; justify-content:center; padding: 8px; }
+    .spinner-caption { text-align:center; color:#cbd5e1; }
+    .loading-spinner { width: 28px; height: 28px; border: 3px solid rgba(255,255,255,0.15); border-top: 3px solid #22d3ee; border-radius: 50%; animation: spin 1s linear infinite; }
+    @keyframes spin { 0% { transform: rotate(0deg);} 100% { transform: rotate(360deg);} }
+    @keyframes floatY { 0%{transform: translateY(0);} 50%{transform: translateY(-4px);} 100%{transform: translateY(0);} }
+    @keyframes pulseGlow { 0%{filter:brightness(1);} 50%{filter:brightness(1.4);} 100%{filter:brightness(1);} }
+    /* squared color badges (overrides) */
+    .color-badge { display:inline-flex; align-items:center; gap:8px; margin:4px 10px 4px 0; padding:6px 10px; border-radius:8px; border:1px solid #1f2937; background:#0b1220; color:#cbd5e1; }
+    .color-name { text-transform:capitalize; }
+"""
+
+# The copy widget renders inside its own iframe, so it cannot use the page stylesheet
+COPY_CSS_SOURCE = """
+    .copy-wrap { display:flex; gap:8px; align-items:center; background:#0b1220; padding:12px; border-radius:10px; border:1px solid #1f2937; }
+    .copy-input { flex:1; padding:10px; font-size:16px; background:#0b1220; color:#e2e8f0; border:1px solid #1f2937; border-radius:8px; }
+    .copy-button { background:#22d3ee; color:#0b1220; border:none; border-radius:8px; padding:10px 14px; cursor:pointer; font-weight:600; }
+    .copy-button:hover { filter: brightness(1.1); }
+"""
+
+SPINNER_HTML = (
+    "<div class='spinner-container'><div class='loading-spinner'></div></div>"
+    "<div class='spinner-caption'>Analyzing your outfit…</div>"
+)
+
+
+def minify_css(css: str) -> str:
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+
+@lru_cache(maxsize=None)
+def stylesheet() -> str:
+    """The app's ``<style>`` block, minified once per process."""
+    return f"<style>{minify_css(CSS_SOURCE)}</style>"
+
+
+@lru_cache(maxsize=None)
+def _copy_stylesheet() -> str:
+    return f"<style>{minify_css(COPY_CSS_SOURCE)}</style>"
+
+
+@lru_cache(maxsize=1024)
+def color_chip_html(name: str, index: int = 0) -> str:
+    return (
+        f"<span class='color-badge'>{get_color_emoji(name, index)} "
+        f"<span class='color-name'>{html.escape(name)}</span></span>"
+    )
+
+
+def color_chips_html(colors: Sequence[NamedColor]) -> str:
+    return "".join(color_chip_html(c.name, i) for i, c in enumerate(colors))
+
+
+@lru_cache(maxsize=1024)
+def color_badge_html(name: str, hex_color: str) -> str:
+    # Self-contained (inline styles) so it also works without stylesheet()
+    return (
+        "<span style='display:inline-flex;align-items:center;gap:8px;margin:4px 10px 4px 0;padding:6px 10px;border-radius:10px;border:1px solid #e5e7eb;background:rgba(255,255,255,0.9)'>"
+        f"<span style='display:inline-block;width:18px;height:18px;background:{html.escape(hex_color)};border:1px solid #d1d5db; clip-path: polygon(25% 6.7%, 75% 6.7%, 100% 50%, 75% 93.3%, 25% 93.3%, 0% 50%);'></span>"
+        f"<span style='font-size:0.95rem;text-transform:capitalize'>{html.escape(name)}</span>"
+        "</span>"
+    )
+
+
+def color_badges_html(colors: Sequence[NamedColor]) -> str:
+    return "".join(color_badge_html(c.name, c.hex) for c in colors)
+
+
+def emoji_display_html(emoji_parts: Dict[str, List[str]]) -> str:
+    """Animated emoji line; the keyframes it uses come from stylesheet()."""
+    location = ""
+    if emoji_parts.get("location"):
+        location = f"<span class='emoji-location'>{emoji_parts['location'][0]}</span>"
+    return (
+        f"<div class='emoji-display'>{' '.join(emoji_parts.get('items', []))} "
+        f"{' '.join(emoji_parts.get('colors', []))} {location}</div>"
+    )
+
+
+@lru_cache(maxsize=256)
+def copy_widget_html(emoji_str: str) -> str:
+    return (
+        f"{_copy_stylesheet()}<div class='copy-wrap'>"
+        f"<input id='emojiOutput' class='copy-input' value=\"{html.escape(emoji_str)}\" readonly />"
+        "<button class='copy-button' onclick=\"navigator.clipboard.writeText(document.getElementById('emojiOutput').value); "
+        "this.innerHTML='✅ Copied!'; setTimeout(() => this.innerHTML='📋 Copy', 1600)\">📋 Copy</button></div>"
+    )
+
+
+# Rough per-entry sizes (str objects included) for the process memory budget
+for _cached, _entry_bytes in ((color_chip_html, 250), (color_badge_html, 700), (copy_widget_html, 1500)):
+    register_lru_cache(process_budget(), f"rendering:{_cached.__name__}", _cached, _entry_bytes)
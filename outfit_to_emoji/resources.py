@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .detection import load_imagenet_model, warmup_model
+from .zoo import DEFAULT_MODEL, get_model_spec
+
+try:
+    import tensorflow as tf
+    TENSORFLOW_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dep guard
+    TENSORFLOW_AVAILABLE = False
+    tf = None  # type: ignore
+
+
+MODEL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "outfit_to_emoji", "models")
+
+
+@dataclass
+class ResourceMetrics:
+    loads: int = 0
+    reloads: int = 0
+    idle_evictions: int = 0
+    budget_evictions: int = 0
+    last_load_s: float = 0.0
+    total_reload_s: float = 0.0
+
+    @property
+    def mean_reload_s(self) -> float:
+        return self.total_reload_s / self.reloads if self.reloads else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data["mean_reload_s"] = self.mean_reload_s
+        return data
+
+
+@dataclass
+class _Consumer:
+    size: Callable[[], int]
+    evict: Callable[[], None]
+    last_used: float
+
+
+class MemoryBudget:
+    """Per-process memory budget shared by the model, caches and image buffers.
+
+    Consumers report their own size; when the total goes over ``limit_bytes``
+    the least recently used ones are evicted until it fits again. Consumers
+    call ``enforce(keep=<themselves>)`` whenever they grow.
+    """
+
+    def __init__(self, limit_bytes: Optional[int], metrics: Optional[ResourceMetrics] = None) -> None:
+        self.limit_bytes = limit_bytes
+        self.metrics = metrics or ResourceMetrics()
+        self._consumers: Dict[str, _Consumer] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, size: Callable[[], int], evict: Callable[[], None]) -> None:
+        with self._lock:
+            self._consumers[name] = _Consumer(size=size, evict=evict, last_used=time.monotonic())
+
+    def unregister(self, name: str) -> None:
+        with self._lock:
+            self._consumers.pop(name, None)
+
+    def touch(self, name: str) -> None:
+        with self._lock:
+            if name in self._consumers:
+                self._consumers[name].last_used = time.monotonic()
+
+    def used_bytes(self) -> int:
+        # size() runs without the lock: consumers may call register/unregister under their own locks
+        with self._lock:
+            consumers = list(self._consumers.values())
+        return sum(c.size() for c in consumers)
+
+    def enforce(self, keep: Optional[str] = None, spare: Tuple[str, ...] = ()) -> List[str]:
+        """Evict least recently used consumers (never ``keep``) until under the limit.
+
+        Consumers whose name starts with one of the ``spare`` prefixes are left alone too.
+        """
+        evicted: List[str] = []
+        if self.limit_bytes is None:
+            return evicted
+        with self._lock:
+            candidates = sorted(
+                (
+                    (name, c) for name, c in self._consumers.items()
+                    if name != keep and not name.startswith(spare)
+                ),
+                key=lambda item: item[1].last_used,
+            )
+        # Evictions run without the lock: a consumer's evict() may be slow or unregister itself
+        for name, consumer in candidates:
+            if self.used_bytes() <= self.limit_bytes:
+                break
+            if consumer.size() <= 0:
+                continue
+            consumer.evict()
+            with self._lock:
+                self.metrics.budget_evictions += 1
+            evicted.append(name)
+        return evicted
+
+
+class ModelManager:
+    """Owns the detection model: loads on demand, unloads when idle or over budget.
+
+    The first load saves the built model under ``cache_dir`` so later reloads
+    skip the ImageNet weight download and rebuild from the local copy. With a
+    ``bundle_path`` every load comes from that offline bundle instead.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_MODEL,
+        idle_timeout_s: Optional[float] = 900.0,
+        cache_dir: str = MODEL_CACHE_DIR,
+        budget: Optional[MemoryBudget] = None,
+        warmup: bool = True,
+        bundle_path: Optional[str] = None,
+        runtime: str = "keras",
+    ) -> None:
+        self.model_name = model_name
+        self.spec = get_model_spec(model_name)
+        self.idle_timeout_s = idle_timeout_s
+        self.cache_dir = cache_dir
+        self.budget = budget
+        self.warmup = warmup
+        self.bundle_path = bundle_path
+        self.runtime = runtime
+        self.metrics = budget.metrics if budget is not None else ResourceMetrics()
+        self._model = None
+        self._last_used = 0.0
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+        if budget is not None:
+            budget.register(self._budget_name, self.size_bytes, lambda: self.unload(reason="budget"))
+        if idle_timeout_s:
+            self._reaper = threading.Thread(target=self._reap, name="outfit-model-reaper", daemon=True)
+            self._reaper.start()
+
+    @property
+    def _budget_name(self) -> str:
+        return f"model:{self.model_name}"
+
+    @property
+    def cached_path(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.model_name}.keras")
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self):
+        with self._lock:
+            if self._model is None:
+                self._model = self._load()
+            # Bound under the lock: an eviction right after must not turn this call into None
+            model = self._model
+            self._last_used = time.monotonic()
+        if self.budget is not None:
+            self.budget.touch(self._budget_name)
+            self.budget.enforce(keep=self._budget_name)
+        return model
+
+    def _load(self):
+        t0 = time.perf_counter()
+        if self.bundle_path:
+            from .bundle import load_bundle
+
+            is_reload = self.metrics.loads > 0
+            model, self.spec = load_bundle(
+                self.bundle_path, self.model_name, runtime=self.runtime, warmup=self.warmup
+            )
+            self._record_load(time.perf_counter() - t0, is_reload)
+            return model
+
+        # A reload is a load after an unload in this process, not a first load from the disk cache
+        is_reload = self.metrics.loads > 0
+        if os.path.exists(self.cached_path) and TENSORFLOW_AVAILABLE:
+            model = tf.keras.models.load_model(self.cached_path, compile=False)
+        else:
+            model = load_imagenet_model(self.model_name)
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                model.save(self.cached_path)
+            except OSError:
+                pass  # read-only cache dir: reloads just rebuild from Keras weights
+        if self.warmup:
+            warmup_model(model, self.spec)
+        self._record_load(time.perf_counter() - t0, is_reload)
+        return model
+
+    def _record_load(self, elapsed: float, is_reload: bool) -> None:
+        self.metrics.loads += 1
+        self.metrics.last_load_s = elapsed
+        if is_reload:
+            self.metrics.reloads += 1
+            self.metrics.total_reload_s += elapsed
+
+    def unload(self, reason: str = "manual") -> None:
+        with self._lock:
+            if self._model is None:
+                return
+            self._model = None
+            if reason == "idle":
+                self.metrics.idle_evictions += 1
+        self._teardown()
+
+    @staticmethod
+    def _teardown() -> None:
+        # Process-wide and slow; must run without holding the manager lock so get() is not blocked
+        if TENSORFLOW_AVAILABLE:
+            tf.keras.backend.clear_session()
+        gc.collect()
+
+    def size_bytes(self) -> int:
+        model = self._model
+        # float32 parameters; activations and TF runtime overhead are not counted
+        return int(model.count_params()) * 4 if model is not None else 0
+
+    def _reap(self) -> None:
+        interval = max(1.0, min(30.0, self.idle_timeout_s / 4))
+        while not self._stop.wait(interval):
+            with self._lock:
+                idle = time.monotonic() - self._last_used
+                if self._model is None or idle < self.idle_timeout_s:
+                    continue
+                self._model = None
+                self.metrics.idle_evictions += 1
+            self._teardown()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self.budget is not None:
+            self.budget.unregister(self._budget_name)
+        self.unload()
+
+
+def budget_from_env(var: str = "OUTFIT_TO_EMOJI_MEMORY_BUDGET_MB") -> MemoryBudget:
+    value = os.environ.get(var)
+    return MemoryBudget(int(float(value) * 2**20) if value else None)
+
+
+_process_budget: Optional[MemoryBudget] = None
+_process_budget_lock = threading.Lock()
+
+
+def process_budget() -> MemoryBudget:
+    """The per-process budget (from ``OUTFIT_TO_EMOJI_MEMORY_BUDGET_MB``) that all consumers share."""
+    global _process_budget
+    with _process_budget_lock:
+        if _process_budget is None:
+            _process_budget = budget_from_env()
+        return _process_budget
+
+
+def register_lru_cache(budget: MemoryBudget, name: str, cached: Callable[..., Any], entry_bytes: int) -> None:
+    """Count a ``functools.lru_cache`` against ``budget``; eviction clears it.
+
+    lru_cache does not expose its entries, so the size is ``currsize * entry_bytes``.
+    """
+    budget.register(name, lambda: cached.cache_info().currsize * entry_bytes, cached.cache_clear)
+
+
+def manager_from_env(**kwargs: Any) -> ModelManager:
+    """ModelManager configured from ``OUTFIT_TO_EMOJI_*`` environment variables.
+
+    When a bundle is configured the model is loaded and warmed immediately, so
+    the first user request does not pay for it.
+    """
+    idle = os.environ.get("OUTFIT_TO_EMOJI_MODEL_IDLE_S")
+    manager = ModelManager(
+        model_name=os.environ.get("OUTFIT_TO_EMOJI_MODEL", DEFAULT_MODEL),
+        idle_timeout_s=float(idle) if idle else 900.0,
+        budget=process_budget(),
+        bundle_path=os.environ.get("OUTFIT_TO_EMOJI_BUNDLE") or None,
+        runtime=os.environ.get("OUTFIT_TO_EMOJI_RUNTIME", "keras"),
+        **kwargs,
+    )
+    if manager.bundle_path:
+        manager.get()
+    return manager
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .colors import NamedColor
+from .emoji_map import map_items_and_colors_to_emojis
+from .pipeline import AnalysisResult, _colors, _detect, _timed
+from .views import ImageViews
+from .zoo import ModelSpec
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised by submit() when the scheduler is too busy to take the request."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """Set on a request's future when its deadline passed before it could run."""
+
+
+@dataclass
+class SchedulerMetrics:
+    submitted: int = 0
+    rejected: int = 0
+    expired: int = 0
+    degraded: int = 0
+    completed: int = 0
+    failed: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class _Request:
+    def __init__(self, image: Image.Image, deadline: float, detect: bool) -> None:
+        self.views = ImageViews(image)
+        self.deadline = deadline
+        self.submitted_at = time.monotonic()
+        self.future: Future = Future()
+        self.items: List[Tuple[str, float]] = []
+        self.colors: List[NamedColor] = []
+        self.timings: Dict[str, float] = {}
+        self.degraded = False
+        self._pending = 2 if detect else 1
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    def part_done(self) -> bool:
+        """True once every part of this request has finished."""
+        with self._lock:
+            self._pending -= 1
+            return self._pending == 0
+
+
+@dataclass(order=True)
+class _Job:
+    deadline: float
+    seq: int
+    request: _Request = field(compare=False)
+
+
+class _DeadlineQueue:
+    """Bounded earliest-deadline-first queue."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._heap: List[_Job] = []
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def full(self) -> bool:
+        return len(self._heap) >= self.maxsize
+
+    def try_put(self, request: _Request) -> bool:
+        with self._cond:
+            if self._closed or len(self._heap) >= self.maxsize:
+                return False
+            heapq.heappush(self._heap, _Job(request.deadline, next(self._seq), request))
+            self._cond.notify()
+            return True
+
+    def get(self) -> Optional[_Request]:
+        with self._cond:
+            while not self._heap and not self._closed:
+                self._cond.wait()
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap).request
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class InferenceScheduler:
+    """Admission control and deadline-aware scheduling in front of the model.
+
+    Detection and color extraction each have a bounded earliest-deadline-first
+    queue. Requests whose deadline passes while queued are dropped before they
+    reach the model. When the detection queue is full, a request is degraded
+    to a colors-only result instead of queueing behind the CNN; when the color
+    queue is full too, submit() raises AdmissionRejected.
+    """
+
+    def __init__(
+        self,
+        model,
+        spec: Optional[ModelSpec] = None,
+        top_k: int = 5,
+        num_colors: int = 4,
+        detection_queue_size: int = 8,
+        color_queue_size: int = 32,
+        detection_workers: int = 1,
+        color_workers: int = 2,
+        default_deadline_s: float = 10.0,
+        degrade: bool = True,
+        mask_background: bool = False,
+    ) -> None:
+        self.model = model
+        self.spec = spec
+        self.top_k = top_k
+        self.num_colors = num_colors
+        self.default_deadline_s = default_deadline_s
+        self.degrade = degrade
+        self.mask_background = mask_background
+        self.metrics = SchedulerMetrics()
+        self._metrics_lock = threading.Lock()
+        self._detection_queue = _DeadlineQueue(detection_queue_size)
+        self._color_queue = _DeadlineQueue(color_queue_size)
+        self._threads = [
+            threading.Thread(target=self._work, args=(self._detection_queue, self._run_detection), name=f"outfit-detect-{i}", daemon=True)
+            for i in range(detection_workers)
+        ] + [
+            threading.Thread(target=self._work, args=(self._color_queue, self._run_colors), name=f"outfit-colors-{i}", daemon=True)
+            for i in range(color_workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def _count(self, name: str) -> None:
+        with self._metrics_lock:
+            setattr(self.metrics, name, getattr(self.metrics, name) + 1)
+
+    def submit(self, image: Image.Image, deadline_s: Optional[float] = None) -> Future:
+        """Queue ``image`` for analysis; the returned future yields an AnalysisResult."""
+        self._count("submitted")
+        deadline = time.monotonic() + (deadline_s if deadline_s is not None else self.default_deadline_s)
+        detect = self.model is not None and not self._detection_queue.full()
+        if self.model is not None and not detect and not self.degrade:
+            self._count("rejected")
+            raise AdmissionRejected("Detection queue is full.")
+
+        request = _Request(image, deadline, detect)
+        if not self._color_queue.try_put(request):
+            self._count("rejected")
+            raise AdmissionRejected("Color queue is full.")
+        if self.model is not None and not detect:
+            request.degraded = True
+        elif detect and not self._detection_queue.try_put(request):
+            # Lost a race for the last detection slot: fall back to colors only
+            request.degraded = True
+            if request.part_done():
+                self._complete(request)
+        if request.degraded:
+            self._count("degraded")
+        return request.future
+
+    def _work(self, queue: _DeadlineQueue, run) -> None:
+        while True:
+            request = queue.get()
+            if request is None:
+                return
+            if request.done:
+                request.views.release()  # cancelled by the caller or already failed
+                continue
+            if time.monotonic() > request.deadline:
+                self._fail(request, DeadlineExceeded("Request deadline passed while queued."), "expired")
+                continue
+            request.timings.setdefault("queue", time.monotonic() - request.submitted_at)
+            try:
+                run(request)
+            except Exception as exc:
+                self._fail(request, exc, "failed")
+                continue
+            if request.part_done():
+                self._complete(request)
+
+    def _run_detection(self, request: _Request) -> None:
+        request.items = _timed(
+            request.timings, "detection", _detect, request.views, self.model, self.spec, self.top_k
+        )
+
+    def _run_colors(self, request: _Request) -> None:
+        request.colors = _timed(
+            request.timings, "colors", _colors, request.views, self.num_colors, self.mask_background
+        )
+
+    def _fail(self, request: _Request, exc: BaseException, metric: str) -> None:
+        request.views.release()
+        if not request.future.done():
+            try:
+                request.future.set_exception(exc)
+            except Exception:
+                return  # another worker resolved it first
+            self._count(metric)
+
+    def _complete(self, request: _Request) -> None:
+        request.views.release()
+        if request.future.done():
+            return
+        emoji_str, emoji_parts = _timed(
+            request.timings, "emoji", map_items_and_colors_to_emojis, request.items, request.colors
+        )
+        result = AnalysisResult(
+            items=request.items,
+            colors=request.colors,
+            emoji=emoji_str,
+            emoji_parts=emoji_parts,
+            timings=request.timings,
+            degraded=request.degraded,
+        )
+        try:
+            request.future.set_result(result)
+        except Exception:
+            return
+        self._count("completed")
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {"detection": len(self._detection_queue), "colors": len(self._color_queue)}
+
+    def close(self) -> None:
+        self._detection_queue.close()
+        self._color_queue.close()
+        for t in self._threads:
+            t.join()
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import functools
+import glob
+import json
+import os
+import queue
+import struct
+import tarfile
+import threading
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from .colors import extract_dominant_colors_from_thumbnails
+from .detection import detect_clothing_items_batch
+from .emoji_map import map_items_and_colors_to_emojis
+from .imaging import read_image_from_bytes
+from .pipeline import AnalysisResult
+from .views import ImageViews
+from .zoo import ModelSpec, get_model_spec
+
+IMAGE_EXTENSIONS = ("jpg", "jpeg", "png", "webp")
+
+Member = Tuple[str, bytes]
+
+
+def iter_tar_members(stream: IO[bytes]) -> Iterator[Member]:
+    """Regular files of a (optionally compressed) tar stream, in archive order, without seeking."""
+    with tarfile.open(fileobj=stream, mode="r|*") as tar:
+        for info in tar:
+            if not info.isfile():
+                continue
+            f = tar.extractfile(info)
+            if f is not None:
+                yield info.name, f.read()
+
+
+class _PushbackReader:
+    def __init__(self, stream: IO[bytes]) -> None:
+        self._stream = stream
+        self._buffer = b""
+
+    def read(self, n: int) -> bytes:
+        if len(self._buffer) >= n:
+            data, self._buffer = self._buffer[:n], self._buffer[n:]
+            return data
+        data = self._buffer + self._stream.read(n - len(self._buffer))
+        self._buffer = b""
+        return data
+
+    def unread(self, data: bytes) -> None:
+        self._buffer = data + self._buffer
+
+
+_ZIP_LOCAL_HEADER = struct.Struct("<HHHHHIIIHH")
+_ZIP_DESCRIPTOR_SIG = b"PK\x07\x08"
+
+
+def iter_zip_members(stream: IO[bytes]) -> Iterator[Member]:
+    """Files of a zip stream read front to back via local headers; the central directory is never needed.
+
+    Supports stored and deflated entries, including deflated entries written
+    with a trailing data descriptor. Zip64 archives are not supported.
+    """
+    reader = _PushbackReader(stream)
+    while reader.read(4) == b"PK\x03\x04":
+        header = reader.read(_ZIP_LOCAL_HEADER.size)
+        _, flags, method, _, _, _, csize, _, name_len, extra_len = _ZIP_LOCAL_HEADER.unpack(header)
+        name = reader.read(name_len).decode("utf-8" if flags & 0x800 else "cp437")
+        reader.read(extra_len)
+        has_descriptor = bool(flags & 0x08)
+        if csize == 0xFFFFFFFF:
+            raise ValueError(f"Zip64 entry {name!r} is not supported by the streaming reader")
+
+        if has_descriptor:
+            if method != 8:
+                raise ValueError(f"Entry {name!r}: stored entries with a data descriptor cannot be streamed")
+            inflater = zlib.decompressobj(-15)
+            chunks: List[bytes] = []
+            while not inflater.eof:
+                block = reader.read(64 * 1024)
+                if not block:
+                    raise ValueError(f"Truncated zip entry {name!r}")
+                chunks.append(inflater.decompress(block))
+            reader.unread(inflater.unused_data)
+            data = b"".join(chunks)
+            sig = reader.read(4)
+            reader.read(12 if sig == _ZIP_DESCRIPTOR_SIG else 8)
+        else:
+            raw = reader.read(csize)
+            if method == 0:
+                data = raw
+            elif method == 8:
+                data = zlib.decompress(raw, -15)
+            else:
+                raise ValueError(f"Entry {name!r}: unsupported zip compression method {method}")
+
+        if not name.endswith("/"):
+            yield name, data
+
+
+def _sample_key(name: str) -> Tuple[str, str]:
+    # WebDataset convention: the key is the path up to the first dot of the basename
+    directory, base = os.path.split(name)
+    stem, _, ext = base.partition(".")
+    return os.path.join(directory, stem), ext.lower()
+
+
+def group_samples(members: Iterable[Member]) -> Iterator[Tuple[str, Dict[str, bytes]]]:
+    """Group consecutive members sharing a WebDataset key into {extension: bytes}."""
+    key: Optional[str] = None
+    parts: Dict[str, bytes] = {}
+    for name, data in members:
+        member_key, ext = _sample_key(name)
+        if member_key != key and parts:
+            yield key, parts  # type: ignore[misc]
+            parts = {}
+        key = member_key
+        parts[ext] = data
+    if parts:
+        yield key, parts  # type: ignore[misc]
+
+
+def iter_shard_members(path: str) -> Iterator[Member]:
+    with open(path, "rb") as f:
+        if path.lower().endswith(".zip"):
+            yield from iter_zip_members(f)
+        else:
+            yield from iter_tar_members(f)
+
+
+@dataclass
+class ShardSample:
+    shard: str
+    key: str
+    # Resized to the detection model's input size, uint8
+    model_input: np.ndarray = field(repr=False)
+    # THUMBNAIL_SIZE x THUMBNAIL_SIZE uint8 for color extraction
+    thumbnail: np.ndarray = field(repr=False)
+    # Non-image parts of the sample (.json parsed, .txt/.cls decoded, others raw bytes)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    # Full-resolution decode, only with iter_shard_images(keep_image=True)
+    image: Optional[Image.Image] = field(default=None, repr=False)
+
+
+def _decode_meta(ext: str, data: bytes) -> Any:
+    if ext == "json":
+        return json.loads(data)
+    if ext in ("txt", "cls"):
+        return data.decode("utf-8").strip()
+    return data
+
+
+def _prepare_sample(
+    shard: str, key: str, parts: Dict[str, bytes], spec: ModelSpec, keep_image: bool = False
+) -> Optional[ShardSample]:
+    image_ext = next((ext for ext in parts if ext.rsplit(".", 1)[-1] in IMAGE_EXTENSIONS), None)
+    if image_ext is None:
+        return None
+    image = read_image_from_bytes(parts[image_ext])
+    # The sample keeps the arrays; the views object itself is done once they are built
+    with ImageViews(image) as views:
+        return ShardSample(
+            shard=shard,
+            key=key,
+            model_input=views.model_input(spec.input_size),
+            thumbnail=views.thumbnail(),
+            meta={ext: _decode_meta(ext, data) for ext, data in parts.items() if ext != image_ext},
+            image=image if keep_image else None,
+        )
+
+
+_END = object()
+
+
+def iter_shard_images(
+    shards: Union[str, List[str]],
+    spec: Optional[ModelSpec] = None,
+    num_workers: int = 4,
+    prefetch: int = 32,
+    skip_errors: bool = True,
+    prepare: Optional[Callable[[str, str, Dict[str, bytes], ModelSpec], Optional[ShardSample]]] = None,
+    keep_image: bool = False,
+) -> Iterator[ShardSample]:
+    """Stream decoded, preprocessed samples from tar/zip/WebDataset shards (a path, glob or list) in archive order.
+
+    A reader thread walks the shards sequentially and hands members to
+    ``num_workers`` decode threads; at most ``prefetch`` samples are in flight,
+    so I/O and decoding overlap with whatever the caller does with each sample
+    while memory stays bounded. Samples hold only the resized uint8 arrays;
+    ``keep_image=True`` also keeps the full-resolution decode, which can cost
+    tens of MB per in-flight sample. Undecodable samples are skipped unless
+    ``skip_errors`` is False.
+    """
+    paths = (sorted(glob.glob(shards)) or [shards]) if isinstance(shards, str) else list(shards)
+    spec = spec or get_model_spec()
+    prepare = prepare or functools.partial(_prepare_sample, keep_image=keep_image)
+    pending: "queue.Queue[Any]" = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="outfit-shard-decode")
+
+    def put(item: Any) -> bool:
+        # Blocks while ``prefetch`` samples are in flight; gives up once the consumer stops
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read() -> None:
+        try:
+            for path in paths:
+                for key, parts in group_samples(iter_shard_members(path)):
+                    if stop.is_set() or not put(pool.submit(prepare, path, key, parts, spec)):
+                        return
+        except BaseException as exc:  # surfaced to the consumer below
+            put(exc)
+            return
+        put(_END)
+
+    reader = threading.Thread(target=read, name="outfit-shard-reader", daemon=True)
+    reader.start()
+    try:
+        while True:
+            item = pending.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            future: Future = item
+            try:
+                sample = future.result()
+            except Exception:
+                if not skip_errors:
+                    raise
+                continue
+            if sample is not None:
+                yield sample
+    finally:
+        stop.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_batches(samples: Iterable[ShardSample], batch_size: int = 32) -> Iterator[List[ShardSample]]:
+    batch: List[ShardSample] = []
+    for sample in samples:
+        batch.append(sample)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def analyze_batch(
+    batch: List[ShardSample],
+    model,
+    spec: Optional[ModelSpec] = None,
+    top_k: int = 5,
+    num_colors: int = 4,
+    mask_background: bool = False,
+) -> List[AnalysisResult]:
+    """One batched predict plus one batched color pass for a list of shard samples."""
+    items: List[List[Tuple[str, float]]]
+    if model is not None:
+        items = detect_clothing_items_batch(
+            np.stack([s.model_input for s in batch]), model, top_k=top_k, spec=spec
+        )
+    else:
+        items = [[] for _ in batch]
+    colors = extract_dominant_colors_from_thumbnails(
+        [s.thumbnail for s in batch], num_colors=num_colors, mask_background=mask_background
+    )
+    results: List[AnalysisResult] = []
+    for sample_items, sample_colors in zip(items, colors):
+        emoji_str, emoji_parts = map_items_and_colors_to_emojis(sample_items, sample_colors)
+        results.append(AnalysisResult(items=sample_items, colors=sample_colors, emoji=emoji_str, emoji_parts=emoji_parts))
+    return results
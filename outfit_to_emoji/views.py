@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from .colors import THUMBNAIL_SIZE
+from .resources import MemoryBudget, process_budget
+
+
+class ImageViews:
+    """Derived views of one image, each computed on first use and kept once.
+
+    Every view is stored in its most compact form (uint8 RGB, or uint8
+    indices into a small palette); conversion to float happens only when a
+    batch is handed to the model. Stages running in different threads share
+    the same instance. Call ``release()`` (or use it as a context manager)
+    once the analysis is done so the buffers are freed right away rather
+    than whenever the result is garbage collected.
+
+    The buffers count against ``budget`` (the process budget by default)
+    while held; evicting them only drops the cache, and a view that is asked
+    for again is recomputed. Growing views evict caches and other views,
+    never a loaded model.
+    """
+
+    def __init__(self, image: Image.Image, budget: Optional[MemoryBudget] = None) -> None:
+        self._image: Optional[Image.Image] = image
+        self._views: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self._budget = budget if budget is not None else process_budget()
+        self._budget_name = f"views:{id(self)}"
+        self._registered = False
+
+    @property
+    def image(self) -> Image.Image:
+        if self._image is None:
+            raise RuntimeError("ImageViews used after release()")
+        return self._image
+
+    def _get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._views:
+                return self._views[key]
+        # Built outside the lock so stages needing different views don't wait on each other
+        value = build()
+        with self._lock:
+            if self._image is None:
+                return value  # released while building; don't hold on to it
+            value = self._views.setdefault(key, value)
+            if not self._registered:
+                # Under the same lock as release(), so a concurrent release always sees the registration
+                self._budget.register(self._budget_name, lambda: self.nbytes, self._clear)
+                self._registered = True
+        self._budget.touch(self._budget_name)
+        # Never the model: unloading it tears down TF under other threads' predict()
+        # and a tight budget would otherwise force a reload on every request
+        self._budget.enforce(keep=self._budget_name, spare=("model:",))
+        return value
+
+    def _rgb(self, size: int) -> np.ndarray:
+        return self._get(
+            ("rgb", size),
+            lambda: np.asarray(self.image.convert("RGB").resize((size, size)), dtype=np.uint8),
+        )
+
+    def model_input(self, size: int) -> np.ndarray:
+        """``size`` x ``size`` x 3 uint8, before the model's preprocessing."""
+        return self._rgb(size)
+
+    def thumbnail(self) -> np.ndarray:
+        """THUMBNAIL_SIZE x THUMBNAIL_SIZE x 3 uint8 for color extraction."""
+        return self._rgb(THUMBNAIL_SIZE)
+
+    def palette_thumbnail(self, colors: int = 64) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, palette): HxW uint8 indices into a ``colors`` x 3 uint8 palette.
+
+        A third of the size of the RGB thumbnail; meant for dedup/hashing
+        stages that compare images rather than measure exact colors.
+        """
+        def build() -> Tuple[np.ndarray, np.ndarray]:
+            quantized = Image.fromarray(self.thumbnail()).quantize(colors=colors)
+            palette = np.asarray(quantized.getpalette()[: colors * 3], dtype=np.uint8).reshape(-1, 3)
+            return np.asarray(quantized, dtype=np.uint8), palette
+
+        return self._get(("palette", colors), build)
+
+    @property
+    def nbytes(self) -> int:
+        with self._lock:
+            views = list(self._views.values())
+        return sum(
+            sum(a.nbytes for a in v) if isinstance(v, tuple) else v.nbytes for v in views
+        )
+
+    def _clear(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+    def release(self) -> None:
+        with self._lock:
+            self._views.clear()
+            self._image = None
+            if self._registered:
+                self._budget.unregister(self._budget_name)
+                self._registered = False
+
+    def __enter__(self) -> "ImageViews":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
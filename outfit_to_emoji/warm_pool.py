@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import queue
+import time
+from typing import Optional
+
+from .detection import load_imagenet_model, warmup_model
+from .pipeline import AnalysisResult, analyze_outfit_sync
+from .zoo import DEFAULT_MODEL, ModelSpec, get_model_spec
+
+# Set in the parent before forking; workers see these pages copy-on-write
+_WARM_MODEL = None
+_WARM_SPEC: Optional[ModelSpec] = None
+
+
+def prepare_parent(model_name: str = DEFAULT_MODEL) -> float:
+    """Import TF, build the model and trace it once in this process.
+
+    Returns the seconds spent, i.e. the cold-start cost that forked workers skip.
+    """
+    global _WARM_MODEL, _WARM_SPEC
+    t0 = time.perf_counter()
+    spec = get_model_spec(model_name)
+    model = load_imagenet_model(model_name)
+    warmup_model(model, spec)
+    _WARM_MODEL, _WARM_SPEC = model, spec
+    return time.perf_counter() - t0
+
+
+def _init_worker(ready) -> None:
+    # Runs once in every forked worker, including ones the pool re-forks later.
+    # TF's runtime threads do not survive fork; a predict that hangs here means
+    # this TF build cannot be used in fork-server mode.
+    warmup_model(_WARM_MODEL, _WARM_SPEC)
+    ready.put(os.getpid())
+
+
+def _analyze_in_worker(image_bytes: bytes, top_k: int, num_colors: int) -> AnalysisResult:
+    return analyze_outfit_sync(
+        image_bytes, _WARM_MODEL, spec=_WARM_SPEC, top_k=top_k, num_colors=num_colors
+    )
+
+
+class PendingAnalysis:
+    """Handle returned by ``WarmWorkerPool.submit``; ``get()`` waits at most the pool's request timeout."""
+
+    def __init__(self, result, default_timeout: Optional[float]) -> None:
+        self._result = result
+        self._default_timeout = default_timeout
+
+    def ready(self) -> bool:
+        return self._result.ready()
+
+    def get(self, timeout: Optional[float] = None) -> AnalysisResult:
+        return self._result.get(timeout if timeout is not None else self._default_timeout)
+
+
+class WarmWorkerPool:
+    """Fork-server pool: workers inherit an already loaded and traced model.
+
+    The parent pays the TF import, graph build and first-call tracing once in
+    ``start()``; every worker forked afterwards can serve its first image
+    without any of that.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        model_name: str = DEFAULT_MODEL,
+        top_k: int = 5,
+        num_colors: int = 4,
+        startup_timeout: float = 60.0,
+        request_timeout: Optional[float] = 60.0,
+    ) -> None:
+        self.processes = processes or os.cpu_count() or 1
+        self.model_name = model_name
+        self.top_k = top_k
+        self.num_colors = num_colors
+        self.startup_timeout = startup_timeout
+        # Default wait for a result; a worker wedged after fork must not block callers forever
+        self.request_timeout = request_timeout
+        self.parent_warmup_s: Optional[float] = None
+        self._pool = None
+
+    def start(self) -> "WarmWorkerPool":
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise RuntimeError("Fork-server mode needs the 'fork' start method (not available on this platform).")
+        if _WARM_MODEL is None or _WARM_SPEC is None or _WARM_SPEC.name != self.model_name:
+            self.parent_warmup_s = prepare_parent(self.model_name)
+        ctx = multiprocessing.get_context("fork")
+        ready = ctx.Queue()
+        self._pool = ctx.Pool(self.processes, initializer=_init_worker, initargs=(ready,))
+        # Every worker must finish its own warmup predict before the pool takes traffic
+        ready_pids = set()
+        deadline = time.monotonic() + self.startup_timeout
+        try:
+            while len(ready_pids) < self.processes:
+                ready_pids.add(ready.get(timeout=max(0.0, deadline - time.monotonic())))
+        except queue.Empty:
+            self.close()
+            raise RuntimeError(
+                f"Only {len(ready_pids)} of {self.processes} forked workers finished a warmup predict in time; "
+                "this TensorFlow build is not fork-safe, use the lazy get_model path instead."
+            ) from None
+        return self
+
+    def analyze(self, image_bytes: bytes, timeout: Optional[float] = None) -> AnalysisResult:
+        """Blocking analysis; raises ``multiprocessing.TimeoutError`` after ``timeout`` (default ``request_timeout``)."""
+        return self.submit(image_bytes).get(timeout)
+
+    def submit(self, image_bytes: bytes) -> "PendingAnalysis":
+        if self._pool is None:
+            raise RuntimeError("WarmWorkerPool.start() must be called before submitting work.")
+        result = self._pool.apply_async(_analyze_in_worker, (image_bytes, self.top_k, self.num_colors))
+        return PendingAnalysis(result, self.request_timeout)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self) -> "WarmWorkerPool":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from tensorflow.keras import applications as keras_applications
+    from tensorflow.keras.applications.imagenet_utils import decode_predictions
+    TENSORFLOW_AVAILABLE = True
+except Exception:  # pragma: no cover - optional dep guard
+    TENSORFLOW_AVAILABLE = False
+    keras_applications = None  # type: ignore
+    decode_predictions = None  # type: ignore
+
+
+def _require_tensorflow() -> None:
+    if not TENSORFLOW_AVAILABLE:
+        raise RuntimeError(
+            "TensorFlow/Keras not available. Please install tensorflow to run detection."
+        )
+
+
+def _mobilenet_v2_preprocess(x: np.ndarray) -> np.ndarray:
+    _require_tensorflow()
+    return keras_applications.mobilenet_v2.preprocess_input(x.astype("float32"))
+
+
+def _passthrough_preprocess(x: np.ndarray) -> np.ndarray:
+    # MobileNetV3 and EfficientNet carry their own rescaling layers and expect 0..255 input
+    return x.astype("float32")
+
+
+def _imagenet_decode(preds: np.ndarray, top: int = 10):
+    _require_tensorflow()
+    return decode_predictions(preds, top=top)
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """A detection model plus everything needed to feed it and read its output."""
+
+    name: str
+    input_size: int
+    build: Callable[..., Any]
+    preprocess: Callable[[np.ndarray], np.ndarray]
+    decode: Callable[..., Any]
+    # Published ImageNet top-1 accuracy, used to rank models that fit a latency budget
+    top1: float
+
+    def load(self, weights: Optional[str] = "imagenet"):
+        _require_tensorflow()
+        return self.build(weights=weights)
+
+
+def _mobilenet_v2(alpha: float, size: int) -> Callable[..., Any]:
+    def build(weights: Optional[str] = "imagenet"):
+        return keras_applications.MobileNetV2(
+            alpha=alpha, input_shape=(size, size, 3), weights=weights
+        )
+
+    return build
+
+
+def _mobilenet_v3_small(weights: Optional[str] = "imagenet"):
+    return keras_applications.MobileNetV3Small(input_shape=(224, 224, 3), weights=weights)
+
+
+def _efficientnet_b0(weights: Optional[str] = "imagenet"):
+    return keras_applications.EfficientNetB0(input_shape=(224, 224, 3), weights=weights)
+
+
+DEFAULT_MODEL = "mobilenet_v2"
+
+MODEL_ZOO: Dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in [
+        ModelSpec("mobilenet_v2", 224, _mobilenet_v2(1.0, 224), _mobilenet_v2_preprocess, _imagenet_decode, 0.718),
+        ModelSpec("mobilenet_v2_0.75_192", 192, _mobilenet_v2(0.75, 192), _mobilenet_v2_preprocess, _imagenet_decode, 0.672),
+        ModelSpec("mobilenet_v2_0.5_160", 160, _mobilenet_v2(0.5, 160), _mobilenet_v2_preprocess, _imagenet_decode, 0.610),
+        ModelSpec("mobilenet_v2_0.35_128", 128, _mobilenet_v2(0.35, 128), _mobilenet_v2_preprocess, _imagenet_decode, 0.508),
+        ModelSpec("mobilenet_v3_small", 224, _mobilenet_v3_small, _passthrough_preprocess, _imagenet_decode, 0.681),
+        # EfficientNet-Lite is not shipped with Keras; B0 is the closest built-in variant
+        ModelSpec("efficientnet_b0", 224, _efficientnet_b0, _passthrough_preprocess, _imagenet_decode, 0.771),
+    ]
+}
+
+
+def get_model_spec(name: str = DEFAULT_MODEL) -> ModelSpec:
+    try:
+        return MODEL_ZOO[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown model '{name}'. Available: {', '.join(sorted(MODEL_ZOO))}"
+        ) from None
+
+
+@dataclass
+class ModelProfile:
+    name: str
+    host: str
+    latency_ms: float
+    p95_latency_ms: float
+    load_s: float
+    memory_mb: float
+    params: int
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process, or 0 where it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+
+        # ru_maxrss is a high-water mark (KiB on Linux, bytes on macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if platform.system() == "Darwin" else usage * 1024
+    except Exception:
+        return 0
+
+
+def profile_model(spec: ModelSpec, runs: int = 20, warmup: int = 3) -> ModelProfile:
+    """Load ``spec`` and measure single-image predict latency and memory on this host.
+
+    ``memory_mb`` is the RSS growth of this process, so it is only meaningful
+    in a process that has not loaded other models before (see ``profile_zoo``).
+    """
+    rss_before = current_rss_bytes()
+    t0 = time.perf_counter()
+    model = spec.load()
+    load_s = time.perf_counter() - t0
+
+    x = spec.preprocess(np.zeros((1, spec.input_size, spec.input_size, 3), dtype=np.uint8))
+    for _ in range(warmup):
+        model.predict(x, verbose=0)
+    timings: List[float] = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        model.predict(x, verbose=0)
+        timings.append((time.perf_counter() - t) * 1000.0)
+    memory_mb = max(0, current_rss_bytes() - rss_before) / (1024 * 1024)
+
+    return ModelProfile(
+        name=spec.name,
+        host=platform.node(),
+        latency_ms=float(np.median(timings)),
+        p95_latency_ms=float(np.percentile(timings, 95)),
+        load_s=load_s,
+        memory_mb=memory_mb,
+        params=int(model.count_params()),
+    )
+
+
+PROFILE_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "outfit_to_emoji", "model_profiles.json"
+)
+
+
+def _read_profile_cache(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _profile_in_child(name: str, runs: int, queue) -> None:
+    queue.put(asdict(profile_model(get_model_spec(name), runs=runs)))
+
+
+def _profile_isolated(name: str, runs: int, timeout_s: float = 600.0) -> ModelProfile:
+    """``profile_model`` in a freshly spawned interpreter, so no earlier model skews its memory."""
+    import multiprocessing
+    import queue as queue_module
+
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_profile_in_child, args=(name, runs, queue))
+    proc.start()
+    deadline = time.monotonic() + timeout_s
+    try:
+        # Poll so a child that crashed (e.g. TF missing) is reported right away
+        while time.monotonic() < deadline:
+            try:
+                return ModelProfile(**queue.get(timeout=1.0))
+            except queue_module.Empty:
+                if not proc.is_alive():
+                    break
+        raise RuntimeError(f"Profiling '{name}' failed or timed out (exit code {proc.exitcode})")
+    finally:
+        proc.join(timeout=5)
+        if proc.is_alive():
+            proc.terminate()
+
+
+def profile_zoo(
+    names: Optional[List[str]] = None,
+    cache_path: Optional[str] = PROFILE_CACHE_PATH,
+    refresh: bool = False,
+    runs: int = 20,
+    isolate: bool = True,
+) -> Dict[str, ModelProfile]:
+    """Return per-model profiles for this host, measuring any that are not cached yet.
+
+    Profiles are keyed by host name so a shared cache never hands one machine's
+    timings to another. Each model is measured in its own spawned process;
+    with ``isolate=False`` they share this one, and ``memory_mb`` of every
+    model after the first is unreliable (earlier models and TF allocator
+    caches stay resident).
+    """
+    host = platform.node()
+    cache = _read_profile_cache(cache_path) if cache_path else {}
+    host_cache = cache.setdefault(host, {})
+
+    profiles: Dict[str, ModelProfile] = {}
+    for name in names or list(MODEL_ZOO):
+        if name in host_cache and not refresh:
+            profiles[name] = ModelProfile(**host_cache[name])
+            continue
+        profile = _profile_isolated(name, runs) if isolate else profile_model(get_model_spec(name), runs=runs)
+        profiles[name] = profile
+        host_cache[name] = asdict(profile)
+
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w") as f:
+            json.dump(cache, f, indent=2)
+    return profiles
+
+
+def select_model(
+    max_latency_ms: float, profiles: Optional[Dict[str, ModelProfile]] = None
+) -> ModelSpec:
+    """Most accurate model whose median latency fits the budget.
+
+    Falls back to the fastest model when nothing fits.
+    """
+    if profiles is None:
+        profiles = profile_zoo()
+    if not profiles:
+        raise ValueError("No model profiles available to select from.")
+    fitting = [p for p in profiles.values() if p.latency_ms <= max_latency_ms]
+    if fitting:
+        best = max(fitting, key=lambda p: get_model_spec(p.name).top1)
+    else:
+        best = min(profiles.values(), key=lambda p: p.latency_ms)
+    return get_model_spec(best.name)
+
+
+def load_model_under_budget(
+    max_latency_ms: float, profiles: Optional[Dict[str, ModelProfile]] = None
+) -> Tuple[Any, ModelSpec]:
+    spec = select_model(max_latency_ms, profiles=profiles)
+    return spec.load(), spec
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure detection model latency and memory on this host.")
+    parser.add_argument("--models", nargs="*", default=None, help="Subset of models to profile")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached profiles")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Also report the pick for this budget")
+    args = parser.parse_args()
+
+    results = profile_zoo(args.models, refresh=args.refresh, runs=args.runs)
+    for p in sorted(results.values(), key=lambda p: p.latency_ms):
+        print(
+            f"{p.name:<24} {p.latency_ms:8.1f} ms (p95 {p.p95_latency_ms:6.1f})"
+            f"  {p.memory_mb:7.1f} MB  {p.params / 1e6:5.2f}M params"
+        )
+    if args.budget_ms is not None:
+        print(f"best under {args.budget_ms:g} ms: {select_model(args.budget_ms, results).name}")